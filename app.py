@@ -4,6 +4,9 @@ import streamlit as st
 from utils.permissions import login_required
 from utils.auth import logout
 from utils.constants import ROLE_ADMIN, ROLE_MANAGER, ROLE_USER, ROLE_HR
+from utils.asset_summary import get_asset_kpis
+from utils.gsheets import invalidate_sheet, refresh_sheet_handles
+from utils.ids import reset_ids
 
 # ─────────────────────────────────────────────
 # Page config
@@ -75,6 +78,13 @@ if role == ROLE_USER and not st.session_state.get("_user_redirect"):
 st.sidebar.success(f"Logged in as {user['email']} ({role})")
 logout()
 
+# After adding worksheets or editing header rows / IDs by hand in the sheet
+if role == ROLE_ADMIN and st.sidebar.button("🔄 Reload sheets"):
+    refresh_sheet_handles()
+    invalidate_sheet()
+    reset_ids()
+    st.rerun()
+
 # ─────────────────────────────────────────────
 # Hide sidebar navigation (Manager & User)
 # ─────────────────────────────────────────────
@@ -94,6 +104,15 @@ if role in [ROLE_MANAGER, ROLE_USER]:
 # Dashboard Hub (Admin & Manager)
 # ─────────────────────────────────────────────
 st.title("📊 Dashboards")
+
+# Constant-time KPIs from the maintained asset summary
+kpis = get_asset_kpis()
+k1, k2, k3, k4 = st.columns(4)
+k1.metric("Total Assets", kpis["total_qty"])
+k2.metric("Assigned", kpis["total_assigned"])
+k3.metric("Available", kpis["available_qty"])
+k4.metric("Out of Service", kpis["out_of_service_qty"])
+
 st.markdown("Select a dashboard to continue:")
 
 col1, col2 = st.columns(2)
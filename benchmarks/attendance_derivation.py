@@ -0,0 +1,90 @@
+# benchmarks/attendance_derivation.py
+#
+# Row-wise vs vectorized attendance derivation on synthetic logs.
+#
+#   python benchmarks/attendance_derivation.py [rows]
+
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.attendance import derive
+
+LATE_AFTER = 9 * 60 + 30
+EARLY_BEFORE = 17 * 60 + 30
+
+def make_logs(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    first_in = rng.integers(8 * 60, 11 * 60, rows)
+    last_out = rng.integers(15 * 60, 20 * 60, rows)
+    hours = np.round(rng.uniform(0, 10, rows), 2)
+    hours[rng.random(rows) < 0.05] = np.nan
+
+    df = pd.DataFrame({
+        "log_date": pd.Timestamp("2022-01-01")
+        + pd.to_timedelta(rng.integers(0, 1000, rows), unit="D"),
+        "first_in_time": [f"{m // 60:02d}:{m % 60:02d}" for m in first_in],
+        "last_out_time": [f"{m // 60:02d}:{m % 60:02d}" for m in last_out],
+        "work_hours": hours,
+    })
+    missing = rng.random(rows) < 0.05
+    df.loc[missing, ["first_in_time", "last_out_time"]] = None
+    return df
+
+# What the dashboard used to do, one row at a time
+def work_hour_status(hours):
+    if pd.isna(hours):
+        return "⚪ NA"
+    if hours >= 8:
+        return "🟢 Full"
+    if hours >= 4:
+        return "🟡 Partial"
+    return "🔴 Low"
+
+def parse_minutes(text):
+    if not isinstance(text, str):
+        return None
+    parsed = datetime.strptime(text, "%H:%M")
+    return parsed.hour * 60 + parsed.minute
+
+def derive_rowwise(df: pd.DataFrame) -> pd.DataFrame:
+    df["work_band"] = df["work_hours"].apply(work_hour_status)
+    df["log_date_text"] = df["log_date"].dt.strftime("%Y-%m-%d")
+    df["in_minute"] = df["first_in_time"].apply(parse_minutes)
+    df["out_minute"] = df["last_out_time"].apply(parse_minutes)
+    df["is_late"] = df["in_minute"].apply(lambda m: m is not None and m > LATE_AFTER)
+    df["is_early_leave"] = df["out_minute"].apply(lambda m: m is not None and m < EARLY_BEFORE)
+    return df
+
+def timed(label: str, fn, df: pd.DataFrame) -> tuple[float, pd.DataFrame]:
+    start = time.perf_counter()
+    out = fn(df.copy())
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:8.3f}s")
+    return elapsed, out
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    df = make_logs(rows)
+    print(f"{rows:,} rows")
+
+    slow, expected = timed("row-wise", derive_rowwise, df)
+    fast, actual = timed("vectorized", lambda d: derive(d, LATE_AFTER, EARLY_BEFORE), df)
+
+    # Same answers both ways
+    assert (actual["work_band"].astype(str) == expected["work_band"]).all()
+    for col in ["in_minute", "out_minute"]:
+        assert actual[col].astype("float64").equals(expected[col].astype("float64"))
+    for col in ["is_late", "is_early_leave"]:
+        assert (actual[col] == expected[col]).all()
+
+    print(f"speedup      {slow / fast:8.1f}x")
+
+if __name__ == "__main__":
+    main()
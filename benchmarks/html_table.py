@@ -0,0 +1,76 @@
+# benchmarks/html_table.py
+#
+# Row-by-row vs vectorized HTML table markup on synthetic rows.
+#
+#   python benchmarks/html_table.py [rows]
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from utils.html_table import table_html
+
+COLUMNS = ["employee_id", "employee_name", "soft_name", "department", "assigned_on"]
+
+def make_rows(rows: int) -> pd.DataFrame:
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "employee_id": [f"EMP-{i:05d}" for i in range(rows)],
+        "employee_name": rng.choice(["Asha K", "Ravi <R>", "Nitesh & Co", "Priya"], rows),
+        "soft_name": rng.choice(["Office", "Zoom", "Slack", "Jira"], rows),
+        "department": rng.choice(["IT", "HR", "Ops", None], rows),
+        "assigned_on": pd.Timestamp("2024-01-01")
+        + pd.to_timedelta(rng.integers(0, 365, rows), unit="D"),
+        "link": rng.choice(["https://example.com/a?x=1&y=2", "", None], rows),
+    })
+    return df
+
+# What render_html_table used to do (minus st.markdown and the CSS)
+def table_html_rowwise(df: pd.DataFrame, columns: list, link_column: str) -> str:
+    html = '<div class="table-wrapper"><table class="custom-table"><thead><tr>'
+    for col in columns:
+        html += f"<th>{col.replace('_', ' ').title()}</th>"
+    html += "<th>Action</th></tr></thead><tbody>"
+
+    for _, row in df.iterrows():
+        html += "<tr>"
+        for col in columns:
+            val = "" if pd.isna(row[col]) else row[col]
+            html += f"<td>{val}</td>"
+        link = row.get(link_column)
+        if pd.notna(link) and str(link).strip():
+            html += f'<td><a class="open-btn" href="{link}" target="_blank">Open</a></td>'
+        else:
+            html += "<td>-</td>"
+        html += "</tr>"
+
+    return html + "</tbody></table></div>"
+
+def timed(label: str, fn) -> tuple[float, str]:
+    start = time.perf_counter()
+    out = fn()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed:8.3f}s  {len(out) / 1e6:6.1f} MB")
+    return elapsed, out
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    df = make_rows(rows)
+    print(f"{rows:,} rows")
+
+    slow, _ = timed("row-wise", lambda: table_html_rowwise(df, COLUMNS, "link"))
+    fast, markup = timed("vectorized", lambda: table_html(df, COLUMNS, "link"))
+
+    # Same table, and nothing unescaped got through
+    assert markup.count("<tr>") == rows + 1
+    assert "<R>" not in markup and "&lt;R&gt;" in markup
+
+    print(f"speedup      {slow / fast:8.1f}x")
+
+if __name__ == "__main__":
+    main()
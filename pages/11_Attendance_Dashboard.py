@@ -1,10 +1,13 @@
 import streamlit as st
-import pandas as pd
 
 from utils.permissions import hr_only
 from utils.auth import logout
 from utils.ui import apply_global_ui
 from utils.navigation import apply_role_based_navigation
+from utils.paged_table import paged_table
+from utils.export import export_data
+from utils.fragments import fragment
+from utils.attendance import get_attendance_store, search_employees
 apply_global_ui()
 # ─────────────────────────────────────────────
 # Global UI + Security
@@ -37,119 +40,161 @@ footer {
 """, unsafe_allow_html=True)
 
 # ─────────────────────────────────────────────
-# PUBLIC GOOGLE SHEET (CSV)
+# Attendance store (local Parquet, see utils.attendance)
 # ─────────────────────────────────────────────
-SHEET_ID = "1FVjiK9Y-AhrogECD6Q8tRZpPiSxOFMevlMKGQWTGsHI"
-SHEET_NAME = "odata"
-CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet={SHEET_NAME}"
+store = get_attendance_store()
+bounds = store.bounds()
 
-@st.cache_data(ttl=600)
-def load_data():
-    df = pd.read_csv(CSV_URL)
-    df["log_date"] = pd.to_datetime(df["log_date"], errors="coerce")
-    df["work_hours"] = pd.to_numeric(df["work_hours"], errors="coerce")
-    return df
-
-df = load_data()
-
-if df.empty:
+if bounds is None:
     st.warning("No data found in attendance sheet.")
     st.stop()
 
+options = {
+    col: store.distinct(col)
+    for col in ["day_status", "leave_status", "user_type"]
+}
+
 # ─────────────────────────────────────────────
-# Filters
+# Filters → query → table → export
+# A fragment: changing a filter reruns only this section, not the store
+# refresh above (see utils.fragments)
 # ─────────────────────────────────────────────
-with st.expander("🔍 Filters", expanded=True):
-    search = st.text_input("Search (Emp ID / First Name)")
-
-    col1, col2 = st.columns(2)
-    with col1:
-        start_date = st.date_input("Start Date", df["log_date"].min().date())
-    with col2:
-        end_date = st.date_input("End Date", df["log_date"].max().date())
-
-    col3, col4 = st.columns(2)
-    with col3:
-        day_status_filter = st.multiselect(
-            "Day Status",
-            sorted(df["day_status"].dropna().unique()),
-            default=sorted(df["day_status"].dropna().unique())
+@fragment
+def attendance_section(store, bounds, options):
+    # Filters
+    with st.expander("🔍 Filters", expanded=True):
+        search = st.text_input("Search (Emp ID / Name)").strip()
+
+        col1, col2 = st.columns(2)
+        with col1:
+            start_date = st.date_input("Start Date", bounds[0])
+        with col2:
+            end_date = st.date_input("End Date", bounds[1])
+
+        col3, col4 = st.columns(2)
+        with col3:
+            day_status_filter = st.multiselect(
+                "Day Status",
+                options["day_status"],
+                default=options["day_status"]
+            )
+        with col4:
+            leave_status_filter = st.multiselect(
+                "Leave Status",
+                options["leave_status"],
+                default=options["leave_status"]
+            )
+
+        user_type_filter = st.multiselect(
+            "User Type",
+            options["user_type"],
+            default=options["user_type"]
         )
-    with col4:
-        leave_status_filter = st.multiselect(
-            "Leave Status",
-            sorted(df["leave_status"].dropna().unique()),
-            default=sorted(df["leave_status"].dropna().unique())
+
+    # Matching empids from the search index (None = no search)
+    empids = search_employees(store, search) if search else None
+
+    view = st.radio("View", ["📋 Records", "📈 Summary"], horizontal=True)
+
+    # Summary mode (answered from the ingest-time rollups)
+    if view == "📈 Summary":
+        col5, col6 = st.columns(2)
+        with col5:
+            grain = st.selectbox(
+                "Period",
+                ["day", "week", "month"],
+                index=2,
+                format_func=str.title
+            )
+        with col6:
+            group_by = st.selectbox(
+                "Group By",
+                ["employee", "user_type"],
+                format_func=lambda v: v.replace("_", " ").title()
+            )
+        st.caption("Day and leave status filters don't apply here; the counts break them down.")
+
+        summary = store.summary(
+            grain,
+            group_by,
+            start_date,
+            end_date,
+            user_type_filter,
+            empids=empids,
         )
 
-    user_type_filter = st.multiselect(
-        "User Type",
-        sorted(df["user_type"].dropna().unique()),
-        default=sorted(df["user_type"].dropna().unique())
-    )
+        st.subheader("📈 Attendance Summary")
+        paged_table(
+            summary,
+            key=f"attendance_summary_{grain}_{group_by}",
+            page_size=100,
+            sort_by="period",
+            ascending=False,
+            column_config={
+                "period": st.column_config.DateColumn("period", format="YYYY-MM-DD"),
+            },
+        )
 
-# ─────────────────────────────────────────────
-# Apply Filters
-# ─────────────────────────────────────────────
-filtered = df.copy()
+        export_data(
+            summary,
+            f"attendance_summary_{grain}_{group_by}.csv",
+            label="⬇ Download Summary",
+            key="attendance_summary_export",
+        )
+        return
+
+    # Apply Filters (one DuckDB query over the months in range)
+    filtered = store.query(
+        start_date,
+        end_date,
+        day_status_filter,
+        leave_status_filter,
+        user_type_filter,
+        empids=empids,
+    )
 
-if search:
-    filtered = filtered[
-        filtered["employee_fname"].str.contains(search, case=False, na=False)
-        | filtered["empid"].astype(str).str.contains(search)
+    # Display (work band, late / early flags are derived at ingest)
+    filtered = filtered.rename(columns={
+        "work_band": "Work Hours Status",
+        "is_late": "Late",
+        "is_early_leave": "Left Early",
+    })
+
+    display_cols = [
+        "empid",
+        "employee_fname",
+        "employee_lname",
+        "gender",
+        "log_date",
+        "user_type",
+        "first_in_time",
+        "last_out_time",
+        "work_hours",
+        "Work Hours Status",
+        "Late",
+        "Left Early",
+        "day_status",
+        "total_in_out",
+        "leave_status"
     ]
+    display_cols = [c for c in display_cols if c in filtered.columns]
+
+    st.subheader("📋 Attendance Records")
+    paged_table(
+        filtered[display_cols],
+        key="attendance",
+        page_size=100,
+        sort_by="log_date",
+        ascending=False,
+        search_columns=["empid", "employee_fname", "employee_lname"],
+        column_config={
+            "log_date": st.column_config.DateColumn("log_date", format="YYYY-MM-DD"),
+        },
+    )
 
-start_dt = pd.to_datetime(start_date)
-end_dt = pd.to_datetime(end_date) + pd.Timedelta(days=1) - pd.Timedelta(seconds=1)
-
-filtered = filtered[
-    (filtered["log_date"] >= start_dt)
-    & (filtered["log_date"] <= end_dt)
-    & (filtered["day_status"].isin(day_status_filter))
-    & (filtered["leave_status"].isin(leave_status_filter))
-    & (filtered["user_type"].isin(user_type_filter))
-]
-
-# ─────────────────────────────────────────────
-# Work Hour Status
-# ─────────────────────────────────────────────
-def work_hour_status(hours):
-    if pd.isna(hours):
-        return "⚪ NA"
-    if hours >= 8:
-        return "🟢 Full"
-    if hours >= 4:
-        return "🟡 Partial"
-    return "🔴 Low"
-
-filtered["Work Hours Status"] = filtered["work_hours"].apply(work_hour_status)
-
-# Display formatting
-filtered["log_date"] = filtered["log_date"].dt.strftime("%Y-%m-%d")
-
-display_cols = [
-    "empid",
-    "employee_fname",
-    "employee_lname",
-    "gender",
-    "log_date",
-    "user_type",
-    "first_in_time",
-    "last_out_time",
-    "work_hours",
-    "Work Hours Status",
-    "day_status",
-    "total_in_out",
-    "leave_status"
-]
-display_cols = [c for c in display_cols if c in filtered.columns]
-
-st.subheader("📋 Attendance Records")
-st.dataframe(filtered[display_cols], use_container_width=True, height=520)
-
-st.download_button(
-    "⬇ Download Filtered CSV",
-    data=filtered[display_cols].to_csv(index=False),
-    file_name="attendance_filtered.csv",
-    mime="text/csv"
-)
\ No newline at end of file
+    export_data(
+        filtered[display_cols],
+        "attendance_filtered.csv",
+        label="⬇ Download Filtered",
+    )
+attendance_section(store, bounds, options)
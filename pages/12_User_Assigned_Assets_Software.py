@@ -1,10 +1,11 @@
 import streamlit as st
-import pandas as pd
-import duckdb
 
 from utils.permissions import admin_or_manager_only
-from utils.gsheets import read_sheet
-from utils.ui import apply_global_ui
+from utils.gsheets import read_sheets
+from utils.duck import query
+from utils.search_index import search_keys
+from utils.export import export_data
+from utils.ui import apply_global_ui, show_data_freshness
 from utils.auth import logout
 
 apply_global_ui()
@@ -16,10 +17,17 @@ st.title("👤 User-wise Assigned Assets & Software")
 # ─────────────────────────────────────────────
 # Load data
 # ─────────────────────────────────────────────
-assets_assign_df = read_sheet("asset_assignments")
-assets_master_df = read_sheet("assets_master")
-software_assign_df = read_sheet("software_assignments")
-employees_df = read_sheet("employee_master")
+sheets = read_sheets([
+    "asset_assignments",
+    "assets_master",
+    "software_assignments",
+    "employee_master",
+])
+show_data_freshness(list(sheets))
+assets_assign_df = sheets["asset_assignments"]
+assets_master_df = sheets["assets_master"]
+software_assign_df = sheets["software_assignments"]
+employees_df = sheets["employee_master"]
 
 dfs = [assets_assign_df, assets_master_df, software_assign_df, employees_df]
 for df in dfs:
@@ -34,14 +42,7 @@ if assets_assign_df.empty and software_assign_df.empty:
 # ─────────────────────────────────────────────
 # DuckDB joins
 # ─────────────────────────────────────────────
-con = duckdb.connect(database=":memory:")
-
-con.register("asset_assign", assets_assign_df)
-con.register("asset_master", assets_master_df)
-con.register("software_assign", software_assign_df)
-con.register("employees", employees_df)
-
-query = """
+assignments_sql = """
 -- ASSETS
 SELECT
     e.employee_id,
@@ -54,9 +55,9 @@ SELECT
     am.location,
     e.department,
     a.assigned_on
-FROM asset_assign a
-JOIN employees e ON a.employee_id = e.employee_id
-JOIN asset_master am ON a.asset_id = am.asset_id
+FROM asset_assignments a
+JOIN employee_master e ON a.employee_id = e.employee_id
+JOIN assets_master am ON a.asset_id = am.asset_id
 WHERE a.assignment_status = 'Assigned'
 
 UNION ALL
@@ -73,12 +74,12 @@ SELECT
     e.location,
     e.department,
     s.assigned_on
-FROM software_assign s
-JOIN employees e ON s.employee_id = e.employee_id
+FROM software_assignments s
+JOIN employee_master e ON s.employee_id = e.employee_id
 WHERE s.assignment_status = 'Assigned'
 """
 
-result_df = con.execute(query).df()
+result_df = query(assignments_sql, sheets=list(sheets))
 
 if result_df.empty:
     st.info("No active assignments found.")
@@ -92,7 +93,7 @@ st.subheader("🔍 Filters")
 col1, col2, col3 = st.columns(3)
 
 with col1:
-    search = st.text_input("Search Employee (ID / Name)")
+    search = st.text_input("Search Employee (ID / Name)").strip()
 
 with col2:
     dept_filter = st.selectbox(
@@ -110,10 +111,8 @@ with col3:
 filtered_df = result_df.copy()
 
 if search:
-    filtered_df = filtered_df[
-        filtered_df["employee_id"].str.contains(search, case=False, na=False)
-        | filtered_df["employee_name"].str.contains(search, case=False, na=False)
-    ]
+    matches = search_keys("employees", search)
+    filtered_df = filtered_df[filtered_df["employee_id"].isin(matches)]
 
 if dept_filter != "All":
     filtered_df = filtered_df[filtered_df["department"] == dept_filter]
@@ -148,9 +147,8 @@ st.dataframe(
 # ─────────────────────────────────────────────
 # Export
 # ─────────────────────────────────────────────
-st.download_button(
-    "⬇ Download CSV",
-    data=filtered_df[display_cols].to_csv(index=False),
-    file_name="user_assigned_assets_software.csv",
-    mime="text/csv",
+export_data(
+    filtered_df[display_cols],
+    "user_assigned_assets_software.csv",
+    label="⬇ Download",
 )
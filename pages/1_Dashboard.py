@@ -1,19 +1,18 @@
 # pages/1_Dashboard.py
 
 import streamlit as st
-import pandas as pd
-import duckdb
 
 from utils.permissions import login_required, admin_only
-from utils.gsheets import read_sheet
+from utils.asset_summary import get_asset_summary
 from utils.export import export_csv
+from utils.fragments import fragment
 from utils.constants import ASSETS_MASTER_SHEET, ASSET_ASSIGNMENTS_SHEET
 
 from utils.permissions import admin_or_manager_only
 from utils.navigation import apply_role_based_navigation
 from utils.auth import logout
 
-from utils.ui import apply_global_ui
+from utils.ui import apply_global_ui, show_data_freshness
 apply_global_ui()
 
 admin_or_manager_only()
@@ -31,115 +30,66 @@ st.title("Dashboard")
 # ─────────────────────────────────────────────
 # Load data
 # ─────────────────────────────────────────────
-assets_df = read_sheet(ASSETS_MASTER_SHEET)
-assignments_df = read_sheet(ASSET_ASSIGNMENTS_SHEET)
+# Maintained incrementally by the asset pages (see utils.asset_summary)
+show_data_freshness([ASSETS_MASTER_SHEET, ASSET_ASSIGNMENTS_SHEET])
+all_summary_df = get_asset_summary()
 
-if assets_df.empty:
+if all_summary_df.empty:
     st.info("No assets found.")
     st.stop()
 
-assets_df.columns = assets_df.columns.str.strip().str.lower()
-
-if not assignments_df.empty:
-    assignments_df.columns = assignments_df.columns.str.strip().str.lower()
-else:
-    assignments_df = pd.DataFrame(columns=["asset_id", "assignment_status"])
-
-# ─────────────────────────────────────────────
-# Filters
-# ─────────────────────────────────────────────
-st.subheader("🔎 Filters")
-
-col1, col2 = st.columns(2)
-
-with col1:
-    category_filter = st.multiselect(
-        "Category",
-        sorted(assets_df["category"].dropna().unique().tolist()),
-        default=sorted(assets_df["category"].dropna().unique().tolist())
-    )
-
-with col2:
-    location_filter = st.multiselect(
-        "Location",
-        sorted(assets_df["location"].dropna().unique().tolist()),
-        default=sorted(assets_df["location"].dropna().unique().tolist())
-    )
-
-filtered_assets_df = assets_df[
-    assets_df["category"].isin(category_filter)
-    & assets_df["location"].isin(location_filter)
-]
-
-if filtered_assets_df.empty:
-    st.warning("No data for selected filters.")
-    st.stop()
-
 # ─────────────────────────────────────────────
-# DuckDB aggregation
+# Filters → KPIs → table → export
+# A fragment: changing a filter reruns only this section, not the data
+# loading above (see utils.fragments)
 # ─────────────────────────────────────────────
-con = duckdb.connect(database=":memory:")
-
-con.register("assets_master", filtered_assets_df)
-
-assigned_df = (
-    assignments_df[assignments_df["assignment_status"] == "Assigned"]
-    if not assignments_df.empty
-    else assignments_df
-)
-
-con.register("asset_assignments", assigned_df[["asset_id"]])
-
-query = """
-SELECT
-    am.category,
-    COUNT(*) AS total_qty,
-
-    /* Inactive / Damaged assets */
-    SUM(
-        CASE 
-            WHEN LOWER(CAST(am.is_active AS VARCHAR)) IN ('false', '0', 'no')
-            THEN 1 
-            ELSE 0 
-        END
-    ) AS out_of_service_qty,
-
-    /* Currently assigned assets */
-    COUNT(a.asset_id) AS total_assigned,
-
-    /* Available assets */
-    COUNT(*) 
-        - SUM(
-            CASE 
-                WHEN LOWER(CAST(am.is_active AS VARCHAR)) IN ('false', '0', 'no')
-                THEN 1 
-                ELSE 0 
-            END
+@fragment
+def summary_section(all_summary_df):
+    # Filters
+    st.subheader("🔎 Filters")
+
+    col1, col2 = st.columns(2)
+
+    with col1:
+        category_filter = st.multiselect(
+            "Category",
+            sorted(all_summary_df["category"].dropna().unique().tolist()),
+            default=sorted(all_summary_df["category"].dropna().unique().tolist())
         )
-        - COUNT(a.asset_id)
-        AS available_qty,
 
-    am.location
-FROM assets_master am
-LEFT JOIN asset_assignments a
-    ON am.asset_id = a.asset_id
-GROUP BY am.category, am.location
-ORDER BY am.category, am.location
-"""
-
-summary_df = con.execute(query).df()
+    with col2:
+        location_filter = st.multiselect(
+            "Location",
+            sorted(all_summary_df["location"].dropna().unique().tolist()),
+            default=sorted(all_summary_df["location"].dropna().unique().tolist())
+        )
 
-# ─────────────────────────────────────────────
-# Dashboard table
-# ─────────────────────────────────────────────
-st.subheader("🧾 Asset Summary")
+    # Summary for the selected filters
+    summary_df = all_summary_df[
+        all_summary_df["category"].isin(category_filter)
+        & all_summary_df["location"].isin(location_filter)
+    ].reset_index(drop=True)
+
+    if summary_df.empty:
+        st.warning("No data for selected filters.")
+        return
+
+    # KPIs
+    k1, k2, k3, k4 = st.columns(4)
+    k1.metric("Total Assets", int(summary_df["total_qty"].sum()))
+    k2.metric("Assigned", int(summary_df["total_assigned"].sum()))
+    k3.metric("Available", int(summary_df["available_qty"].sum()))
+    k4.metric("Out of Service", int(summary_df["out_of_service_qty"].sum()))
+
+    # Dashboard table
+    st.subheader("🧾 Asset Summary")
+
+    st.dataframe(
+        summary_df,
+        use_container_width=True
+    )
 
-st.dataframe(
-    summary_df,
-    use_container_width=True
-)
+    # CSV Export
+    export_csv(summary_df, "asset_dashboard_summary.csv")
 
-# ─────────────────────────────────────────────
-# CSV Export
-# ─────────────────────────────────────────────
-export_csv(summary_df, "asset_dashboard_summary.csv")
+summary_section(all_summary_df)
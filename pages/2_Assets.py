@@ -1,11 +1,13 @@
 # pages/2_Assets.py
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 
 from utils.permissions import admin_only
-from utils.gsheets import read_sheet, append_row
+from utils.gsheets import read_sheet, append_rows
+from utils.ids import next_ids
+from utils.paged_table import paged_table
+from utils.asset_summary import record_assets_created
 from utils.constants import ASSETS_MASTER_SHEET
 from utils.ui import apply_global_ui
 from utils.auth import logout
@@ -45,30 +47,6 @@ location_options = (
 category_options = ["Select"] + category_options + ["Other"]
 location_options = ["Select"] + location_options + ["Other"]
 
-# ─────────────────────────────────────────────
-# SAFE asset_id generator
-# ─────────────────────────────────────────────
-def get_next_asset_ids(existing_df: pd.DataFrame, qty: int):
-    if existing_df.empty or "asset_id" not in existing_df.columns:
-        start = 1
-    else:
-        valid_ids = existing_df[
-            existing_df["asset_id"].astype(str).str.startswith("AST-")
-        ].copy()
-
-        if valid_ids.empty:
-            start = 1
-        else:
-            valid_ids["num"] = (
-                valid_ids["asset_id"]
-                .astype(str)
-                .str.replace("AST-", "", regex=False)
-                .astype(int)
-            )
-            start = valid_ids["num"].max() + 1
-
-    return [f"AST-{str(i).zfill(3)}" for i in range(start, start + qty)]
-
 # ─────────────────────────────────────────────
 # Asset submission form
 # ─────────────────────────────────────────────
@@ -114,25 +92,27 @@ if submit:
         st.stop()
 
     now = datetime.now().isoformat()
-    asset_ids = get_next_asset_ids(assets_df, qty)
-
-    for asset_id in asset_ids:
-        append_row(
-            ASSETS_MASTER_SHEET,
-            {
-                "asset_id": asset_id,
-                "asset_name": asset_name,
-                "category": final_category,
-                "brand": brand,
-                "model": model,
-                "purchase_date": purchase_date.isoformat(),
-                "warranty_end": warranty_end.isoformat(),
-                "location": final_location,
-                "is_active": is_active,
-                "created_at": now,
-                "updated_at": now,
-            },
-        )
+    asset_ids = next_ids("AST", qty)
+
+    new_assets = [
+        {
+            "asset_id": asset_id,
+            "asset_name": asset_name,
+            "category": final_category,
+            "brand": brand,
+            "model": model,
+            "purchase_date": purchase_date.isoformat(),
+            "warranty_end": warranty_end.isoformat(),
+            "location": final_location,
+            "is_active": is_active,
+            "created_at": now,
+            "updated_at": now,
+        }
+        for asset_id in asset_ids
+    ]
+
+    append_rows(ASSETS_MASTER_SHEET, new_assets)
+    record_assets_created(new_assets)
 
     st.success(f"{qty} asset units created successfully")
     st.rerun()
@@ -146,7 +126,4 @@ st.subheader("📋 Asset Inventory (Unit Level)")
 if assets_df.empty:
     st.info("No assets found")
 else:
-    st.dataframe(
-        assets_df.sort_values("asset_id"),
-        use_container_width=True
-    )
+    paged_table(assets_df, key="assets_inventory", sort_by="asset_id")
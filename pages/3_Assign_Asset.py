@@ -1,12 +1,19 @@
 # pages/3_Assign_Asset.py
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 
 from utils.permissions import login_required, admin_only
-from utils.gsheets import read_sheet, append_row
-from utils.constants import ASSETS_MASTER_SHEET, ASSET_ASSIGNMENTS_SHEET
+from utils.gsheets import read_sheets, append_row
+from utils.ids import next_id
+from utils.paged_table import paged_table
+from utils.asset_summary import record_asset_assigned
+from utils.pickers import picker
+from utils.constants import (
+    ASSETS_MASTER_SHEET,
+    ASSET_ASSIGNMENTS_SHEET,
+    EMPLOYEE_MASTER_SHEET,
+)
 from utils.ui import apply_global_ui
 apply_global_ui()
 
@@ -26,9 +33,14 @@ st.title("Assign Asset")
 # ─────────────────────────────────────────────
 # Load data
 # ─────────────────────────────────────────────
-assets_df = read_sheet(ASSETS_MASTER_SHEET)
-assignments_df = read_sheet(ASSET_ASSIGNMENTS_SHEET)
-employees_df = read_sheet("employee_master")
+sheets = read_sheets([
+    ASSETS_MASTER_SHEET,
+    ASSET_ASSIGNMENTS_SHEET,
+    EMPLOYEE_MASTER_SHEET,
+])
+assets_df = sheets[ASSETS_MASTER_SHEET]
+assignments_df = sheets[ASSET_ASSIGNMENTS_SHEET]
+employees_df = sheets[EMPLOYEE_MASTER_SHEET]
 
 for df in [assets_df, assignments_df, employees_df]:
     if not df.empty:
@@ -41,17 +53,17 @@ if assets_df.empty or employees_df.empty:
 # ─────────────────────────────────────────────
 # Currently assigned assets
 # ─────────────────────────────────────────────
-assigned_asset_ids = []
+assigned_asset_ids = set()
 if not assignments_df.empty:
-    assigned_asset_ids = assignments_df[
+    assigned_asset_ids = set(assignments_df[
         assignments_df["assignment_status"] == "Assigned"
-    ]["asset_id"].astype(str).tolist()
+    ]["asset_id"].astype(str))
 
 # ─────────────────────────────────────────────
 # Available assets
 # ─────────────────────────────────────────────
 available_assets = assets_df[
-    (assets_df["is_active"].astype(str).str.lower() == "true")
+    assets_df["is_active"].fillna(False)
     & (~assets_df["asset_id"].isin(assigned_asset_ids))
 ]
 
@@ -64,40 +76,26 @@ active_employees = employees_df[
 ]
 
 # ─────────────────────────────────────────────
-# SAFE assignment_id generator
+# Asset / employee pickers (OUTSIDE FORM → filter as you type)
 # ─────────────────────────────────────────────
-def get_next_assignment_id(df: pd.DataFrame) -> str:
-    if df.empty or "assignment_id" not in df.columns:
-        return "ASN-0001"
-
-    nums = df["assignment_id"].astype(str).str.extract(r"(\d+)")
-    nums = nums.dropna()
-
-    if nums.empty:
-        return "ASN-0001"
-
-    return f"ASN-{str(nums[0].astype(int).max() + 1).zfill(4)}"
+asset_id = picker(
+    "Select Asset",
+    "assets",
+    key="assign_asset",
+    candidates=available_assets["asset_id"],
+)
+
+employee_id = picker(
+    "Select Employee",
+    "employees",
+    key="assign_employee",
+    candidates=active_employees["employee_id"],
+)
 
 # ─────────────────────────────────────────────
 # Assignment form
 # ─────────────────────────────────────────────
 with st.form("assign_asset_form"):
-    asset_option = st.selectbox(
-        "Select Asset",
-        available_assets.apply(
-            lambda x: f"{x['asset_id']} | {x['asset_name']} | {x['location']}",
-            axis=1
-        )
-    )
-
-    employee_option = st.selectbox(
-        "Select Employee",
-        active_employees.apply(
-            lambda x: f"{x['employee_id']} | {x['employee_name']}",
-            axis=1
-        )
-    )
-
     assigned_on = st.date_input("Assigned On", value=datetime.today())
     remarks = st.text_input("Remarks (optional)")
 
@@ -107,14 +105,19 @@ with st.form("assign_asset_form"):
 # Assignment logic
 # ─────────────────────────────────────────────
 if submit:
-    asset_id = asset_option.split(" | ")[0]
-    employee_id, employee_name = employee_option.split(" | ", 1)
+    if asset_id is None or employee_id is None:
+        st.error("Select an asset and an employee.")
+        st.stop()
+
+    employee_name = active_employees.loc[
+        active_employees["employee_id"] == employee_id, "employee_name"
+    ].iloc[0]
 
-    if asset_id in assigned_asset_ids:
+    if str(asset_id) in assigned_asset_ids:
         st.error("Asset already assigned.")
         st.stop()
 
-    assignment_id = get_next_assignment_id(assignments_df)
+    assignment_id = next_id("ASN")
 
     append_row(
         ASSET_ASSIGNMENTS_SHEET,
@@ -131,6 +134,7 @@ if submit:
             "created_at": datetime.now().isoformat(),
         }
     )
+    record_asset_assigned(asset_id)
 
     st.success(f"Asset {asset_id} assigned to {employee_name}")
     st.rerun()
@@ -142,9 +146,9 @@ st.divider()
 st.subheader("📌 Active Asset Assignments")
 
 if not assignments_df.empty:
-    st.dataframe(
-        assignments_df[
-            assignments_df["assignment_status"] == "Assigned"
-        ].sort_values("assigned_on", ascending=False),
-        use_container_width=True
+    paged_table(
+        assignments_df[assignments_df["assignment_status"] == "Assigned"],
+        key="active_assignments",
+        sort_by="assigned_on",
+        ascending=False,
     )
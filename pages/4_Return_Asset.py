@@ -4,7 +4,11 @@ import streamlit as st
 from datetime import datetime
 
 from utils.permissions import admin_only
-from utils.gsheets import read_sheet, write_sheet
+from utils.gsheets import read_sheets, update_rows
+from utils.asset_summary import record_asset_returned
+from utils.paged_table import paged_table
+from utils.pickers import frame_index, picker
+from utils.search_index import sheet_data_version
 from utils.constants import ASSET_ASSIGNMENTS_SHEET, ASSETS_MASTER_SHEET
 from utils.ui import apply_global_ui
 from utils.auth import logout
@@ -21,8 +25,9 @@ st.title("↩️ Return Asset")
 # ─────────────────────────────────────────────
 # Load data
 # ─────────────────────────────────────────────
-assignments_df = read_sheet(ASSET_ASSIGNMENTS_SHEET)
-assets_df = read_sheet(ASSETS_MASTER_SHEET)
+sheets = read_sheets([ASSET_ASSIGNMENTS_SHEET, ASSETS_MASTER_SHEET])
+assignments_df = sheets[ASSET_ASSIGNMENTS_SHEET]
+assets_df = sheets[ASSETS_MASTER_SHEET]
 
 if assignments_df.empty or assets_df.empty:
     st.info("No asset data available.")
@@ -49,23 +54,41 @@ active_assignments = active_assignments.merge(
 )
 
 # ─────────────────────────────────────────────
-# Employee selection (OUTSIDE FORM → dynamic)
+# Active Assignments View (before the return flow, which stops early when
+# the search matches nobody)
 # ─────────────────────────────────────────────
-active_assignments["employee_label"] = (
-    active_assignments["employee_id"] + " | " +
-    active_assignments["employee_name"]
+st.subheader("📌 Currently Assigned Assets")
+
+paged_table(
+    active_assignments,
+    key="returnable_assignments",
+    sort_by="assigned_on",
+    ascending=False,
 )
 
-employee_options = sorted(
-    active_assignments["employee_label"].unique().tolist()
+st.divider()
+
+# ─────────────────────────────────────────────
+# Employee selection (OUTSIDE FORM → dynamic)
+# ─────────────────────────────────────────────
+# Employees holding assets, indexed once per version of the assignments
+assignees = frame_index(
+    "asset_assignees",
+    active_assignments,
+    "employee_id",
+    ["employee_id", "employee_name"],
+    ["employee_id", "employee_name"],
+    sheet_data_version(ASSET_ASSIGNMENTS_SHEET),
 )
 
-selected_employee = st.selectbox(
+employee_id = picker(
     "Select Employee (search by ID or Name) *",
-    employee_options
+    assignees,
+    key="return_employee",
 )
 
-employee_id = selected_employee.split(" | ")[0]
+if employee_id is None:
+    st.stop()
 
 # Filter assets for selected employee
 emp_assets = active_assignments[
@@ -77,8 +100,8 @@ if emp_assets.empty:
     st.stop()
 
 emp_assets["asset_label"] = (
-    emp_assets["asset_id"] + " | " +
-    emp_assets["asset_name"]
+    emp_assets["asset_id"].astype(str) + " | " +
+    emp_assets["asset_name"].fillna("").astype(str)
 )
 
 asset_options = sorted(emp_assets["asset_label"].tolist())
@@ -123,39 +146,34 @@ with st.form("return_asset_form"):
 # ─────────────────────────────────────────────
 if submit:
 
-    assignments_df.loc[
-        assignments_df["assignment_id"] == assignment_id,
-        ["assignment_status", "returned_on", "return_reason"]
-    ] = [
-        "Returned",
-        returned_on.isoformat(),
-        return_reason,
-    ]
+    update_rows(
+        ASSET_ASSIGNMENTS_SHEET,
+        "assignment_id",
+        {
+            assignment_id: {
+                "assignment_status": "Returned",
+                "returned_on": returned_on.isoformat(),
+                "return_reason": return_reason,
+            }
+        },
+    )
 
     if return_reason == "Asset Inactive / Damaged":
-        assets_df.loc[
-            assets_df["asset_id"] == asset_id,
-            "is_active"
-        ] = False
-
-        assets_df.loc[
-            assets_df["asset_id"] == asset_id,
-            "updated_at"
-        ] = datetime.now().isoformat()
-
-    write_sheet(ASSET_ASSIGNMENTS_SHEET, assignments_df)
-    write_sheet(ASSETS_MASTER_SHEET, assets_df)
+        update_rows(
+            ASSETS_MASTER_SHEET,
+            "asset_id",
+            {
+                asset_id: {
+                    "is_active": False,
+                    "updated_at": datetime.now().isoformat(),
+                }
+            },
+        )
+
+    record_asset_returned(
+        asset_id,
+        deactivated=return_reason == "Asset Inactive / Damaged",
+    )
 
     st.success("Asset returned successfully")
     st.rerun()
-
-# ─────────────────────────────────────────────
-# Active Assignments View
-# ─────────────────────────────────────────────
-st.divider()
-st.subheader("📌 Currently Assigned Assets")
-
-st.dataframe(
-    active_assignments.sort_values("assigned_on", ascending=False),
-    use_container_width=True
-)
@@ -1,19 +1,21 @@
 # pages/5_My_Assets.py
 
 import streamlit as st
-import pandas as pd
-import duckdb
 
 from utils.navigation import apply_role_based_navigation
 from utils.permissions import login_required
-from utils.gsheets import read_sheet
+from utils.gsheets import read_sheets
+from utils.duck import query
 from utils.export import export_csv
 from utils.constants import (
     ASSET_ASSIGNMENTS_SHEET,
     ASSETS_MASTER_SHEET,
+    SOFTWARE_ASSIGNMENTS_SHEET,
+    SOFTWARE_MASTER_SHEET,
+    EMPLOYEE_MASTER_SHEET,
     ROLE_ADMIN,
 )
-from utils.ui import apply_global_ui
+from utils.ui import apply_global_ui, show_data_freshness
 from utils.auth import logout
 
 # ─────────────────────────────────────────────
@@ -31,10 +33,19 @@ is_admin = user["role"] == ROLE_ADMIN
 st.title("My Assets")
 
 # ─────────────────────────────────────────────
-# Load ASSET data (UNCHANGED)
+# Load ASSET + SOFTWARE data (one batch request)
 # ─────────────────────────────────────────────
-assignments_df = read_sheet(ASSET_ASSIGNMENTS_SHEET)
-assets_df = read_sheet(ASSETS_MASTER_SHEET)
+sheets = read_sheets([
+    ASSET_ASSIGNMENTS_SHEET,
+    ASSETS_MASTER_SHEET,
+    SOFTWARE_ASSIGNMENTS_SHEET,
+    SOFTWARE_MASTER_SHEET,
+    EMPLOYEE_MASTER_SHEET,
+])
+show_data_freshness(list(sheets))
+
+assignments_df = sheets[ASSET_ASSIGNMENTS_SHEET]
+assets_df = sheets[ASSETS_MASTER_SHEET]
 
 if assignments_df.empty:
     st.info("No asset assignments found.")
@@ -130,9 +141,9 @@ else:
 st.divider()
 st.title("My Software")
 
-software_assign_df = read_sheet("software_assignments")
-software_master_df = read_sheet("software_master")
-employee_df = read_sheet("employee_master")
+software_assign_df = sheets[SOFTWARE_ASSIGNMENTS_SHEET]
+software_master_df = sheets[SOFTWARE_MASTER_SHEET]
+employee_df = sheets[EMPLOYEE_MASTER_SHEET]
 
 for df in [software_assign_df, software_master_df, employee_df]:
     if not df.empty:
@@ -141,18 +152,7 @@ for df in [software_assign_df, software_master_df, employee_df]:
 if software_assign_df.empty:
     st.info("No software assignments found.")
 else:
-    # STRICT user filter (same as assets)
-    if not is_admin:
-        software_assign_df = software_assign_df[
-            software_assign_df["employee_id"] == employee_id
-        ]
-
-    con = duckdb.connect(database=":memory:")
-    con.register("software_assign", software_assign_df)
-    con.register("software_master", software_master_df)
-    con.register("employee", employee_df)
-
-    software_df = con.execute("""
+    software_df = query("""
     SELECT
         e.employee_id,
         e.employee_name,
@@ -162,11 +162,16 @@ else:
         e.department,
         e.location,
         s.assigned_on
-    FROM software_assign s
+    FROM software_assignments s
     JOIN software_master sm ON s.soft_id = sm.soft_id
-    JOIN employee e ON s.employee_id = e.employee_id
+    JOIN employee_master e ON s.employee_id = e.employee_id
     WHERE s.assignment_status = 'Assigned'
-    """).df()
+      -- STRICT user filter (same as assets)
+      AND (? OR CAST(s.employee_id AS VARCHAR) = ?)
+    """,
+        [is_admin, str(employee_id)],
+        sheets=[SOFTWARE_ASSIGNMENTS_SHEET, SOFTWARE_MASTER_SHEET, EMPLOYEE_MASTER_SHEET],
+    )
 
     if software_df.empty:
         st.info("No software assigned.")
@@ -1,11 +1,12 @@
 # pages/8_Credentials.py
 
 import streamlit as st
-import pandas as pd
 from datetime import datetime
 
 from utils.permissions import login_required, admin_only
 from utils.gsheets import read_sheet, append_row
+from utils.ids import next_id
+from utils.constants import CREDENTIALS_SHEET
 from utils.ui import apply_global_ui
 apply_global_ui()
 
@@ -21,7 +22,7 @@ logout()
 
 st.title("Credentials")
 
-SHEET_NAME = "credentials_master"
+SHEET_NAME = CREDENTIALS_SHEET
 
 # ─────────────────────────────────────────────
 # Load existing credentials
@@ -30,23 +31,6 @@ cred_df = read_sheet(SHEET_NAME)
 if not cred_df.empty:
     cred_df.columns = cred_df.columns.str.strip().str.lower()
 
-# ─────────────────────────────────────────────
-# Safe credential_id generator
-# Format: CRED-001
-# ─────────────────────────────────────────────
-def get_next_credential_id(df: pd.DataFrame):
-    if df.empty or "credential_id" not in df.columns:
-        return "CRED-001"
-
-    nums = df["credential_id"].astype(str).str.extract(r"(\d+)")
-    nums = nums.dropna()
-
-    if nums.empty:
-        return "CRED-001"
-
-    next_num = nums[0].astype(int).max() + 1
-    return f"CRED-{str(next_num).zfill(3)}"
-
 # ─────────────────────────────────────────────
 # Submission form
 # ─────────────────────────────────────────────
@@ -73,7 +57,7 @@ if submit:
         st.error("Name, Category, Login ID, and Password are required.")
         st.stop()
 
-    credential_id = get_next_credential_id(cred_df)
+    credential_id = next_id("CRED")
 
     append_row(
         SHEET_NAME,
@@ -1,12 +1,17 @@
 import streamlit as st
-import duckdb
 
 from utils.permissions import admin_or_manager_only
-from utils.gsheets import read_sheet
-from utils.export import export_csv
-from utils.ui import apply_global_ui
+from utils.gsheets import read_sheets
+from utils.duck import query
+from utils.search_index import search_keys
+from utils.export import export_data
+from utils.ui import apply_global_ui, show_data_freshness
 from utils.auth import logout
-from utils.constants import ASSET_ASSIGNMENTS_SHEET, ASSETS_MASTER_SHEET
+from utils.constants import (
+    ASSET_ASSIGNMENTS_SHEET,
+    ASSETS_MASTER_SHEET,
+    EMPLOYEE_MASTER_SHEET,
+)
 
 # ─────────────────────────────────────────────
 # Global UI + Security
@@ -26,9 +31,15 @@ st.title("👥 User Asset Assignments")
 # ─────────────────────────────────────────────
 # Load data
 # ─────────────────────────────────────────────
-assignments_df = read_sheet(ASSET_ASSIGNMENTS_SHEET)
-assets_df = read_sheet(ASSETS_MASTER_SHEET)
-employees_df = read_sheet("employee_master")
+sheets = read_sheets([
+    ASSET_ASSIGNMENTS_SHEET,
+    ASSETS_MASTER_SHEET,
+    EMPLOYEE_MASTER_SHEET,
+])
+show_data_freshness(list(sheets))
+assignments_df = sheets[ASSET_ASSIGNMENTS_SHEET]
+assets_df = sheets[ASSETS_MASTER_SHEET]
+employees_df = sheets[EMPLOYEE_MASTER_SHEET]
 
 if assignments_df.empty or assets_df.empty or employees_df.empty:
     st.warning("Required data is missing.")
@@ -75,13 +86,7 @@ with col3:
 # ─────────────────────────────────────────────
 # DuckDB Query (CORRECT PARAM HANDLING)
 # ─────────────────────────────────────────────
-con = duckdb.connect(database=":memory:")
-
-con.register("assignments", assigned_df)
-con.register("assets", assets_df)
-con.register("employees", employees_df)
-
-query = """
+assignments_sql = """
 SELECT
     a.employee_id,
     a.employee_name,
@@ -91,34 +96,34 @@ SELECT
     e.department,
     e.location,
     a.assigned_on
-FROM assignments a
-LEFT JOIN assets am ON a.asset_id = am.asset_id
-LEFT JOIN employees e ON a.employee_id = e.employee_id
-WHERE 1=1
+FROM asset_assignments a
+LEFT JOIN assets_master am ON a.asset_id = am.asset_id
+LEFT JOIN employee_master e ON a.employee_id = e.employee_id
+WHERE a.assignment_status = 'Assigned'
 """
 
 params = []
 
 if search_text:
-    query += """
-    AND (
-        LOWER(a.employee_id) LIKE LOWER(?)
-        OR LOWER(a.employee_name) LIKE LOWER(?)
-    )
-    """
-    params.extend([f"%{search_text}%", f"%{search_text}%"])
+    # Employee ids from the shared search index
+    assignments_sql += " AND list_contains(?, CAST(a.employee_id AS VARCHAR))"
+    params.append([str(k) for k in search_keys("employees", search_text)])
 
 if department != "All":
-    query += " AND e.department = ?"
+    assignments_sql += " AND e.department = ?"
     params.append(department)
 
 if location != "All":
-    query += " AND e.location = ?"
+    assignments_sql += " AND e.location = ?"
     params.append(location)
 
-query += " ORDER BY a.assigned_on DESC"
+assignments_sql += " ORDER BY a.assigned_on DESC"
 
-result_df = con.execute(query, params).df()
+result_df = query(
+    assignments_sql,
+    params,
+    sheets=[ASSET_ASSIGNMENTS_SHEET, ASSETS_MASTER_SHEET, EMPLOYEE_MASTER_SHEET],
+)
 
 # ─────────────────────────────────────────────
 # Results
@@ -129,4 +134,4 @@ if result_df.empty:
     st.info("No records found for selected filters.")
 else:
     st.dataframe(result_df, use_container_width=True)
-    export_csv(result_df, "user_wise_assigned_assets.csv")
+    export_data(result_df, "user_wise_assigned_assets.csv")
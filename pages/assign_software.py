@@ -2,7 +2,9 @@ import streamlit as st
 from datetime import datetime
 
 from utils.permissions import admin_only
-from utils.gsheets import read_sheet, append_row
+from utils.gsheets import read_sheets, append_row
+from utils.ids import next_id
+from utils.pickers import picker
 from utils.auth import logout
 
 admin_only()
@@ -10,9 +12,14 @@ logout()
 
 st.title("🔗 Assign Software")
 
-soft_df = read_sheet("software_master")
-emp_df = read_sheet("employee_master")
-assign_df = read_sheet("software_assignments")
+sheets = read_sheets([
+    "software_master",
+    "employee_master",
+    "software_assignments",
+])
+soft_df = sheets["software_master"]
+emp_df = sheets["employee_master"]
+assign_df = sheets["software_assignments"]
 
 for df in [soft_df, emp_df, assign_df]:
     if not df.empty:
@@ -24,45 +31,37 @@ if active_soft.empty:
     st.warning("No active software available")
     st.stop()
 
-soft_map = {
-    f"{r['soft_id']} | {r['soft_name']}": r
-    for _, r in active_soft.iterrows()
-}
-
-emp_map = {
-    f"{r['employee_id']} | {r['employee_name']}": r
-    for _, r in emp_df.iterrows()
-}
-
-def next_assign_id(df):
-    if df.empty:
-        return "SASN-001"
-    nums = (
-        df["assignment_id"]
-        .astype(str)
-        .str.replace("SASN-", "", regex=False)
-        .astype(int)
-    )
-    return f"SASN-{str(nums.max()+1).zfill(3)}"
+# Pickers sit outside the form so they filter as you type
+soft_id = picker(
+    "Software *",
+    "software",
+    key="assign_soft",
+    candidates=active_soft["soft_id"],
+)
+employee_id = picker("Employee *", "employees", key="assign_soft_employee")
 
 with st.form("assign_soft_form"):
-    soft_sel = st.selectbox("Software *", list(soft_map.keys()))
-    emp_sel = st.selectbox("Employee *", list(emp_map.keys()))
     remarks = st.text_input("Remarks")
 
     submit = st.form_submit_button("Assign")
 
 if submit:
+    if soft_id is None or employee_id is None:
+        st.error("Select a software and an employee.")
+        st.stop()
+
+    soft = active_soft[active_soft["soft_id"] == soft_id].iloc[0]
+    emp = emp_df[emp_df["employee_id"] == employee_id].iloc[0]
     now = datetime.now().isoformat()
 
     append_row(
         "software_assignments",
         {
-            "assignment_id": next_assign_id(assign_df),
-            "soft_id": soft_map[soft_sel]["soft_id"],
-            "soft_name": soft_map[soft_sel]["soft_name"],
-            "employee_id": emp_map[emp_sel]["employee_id"],
-            "employee_name": emp_map[emp_sel]["employee_name"],
+            "assignment_id": next_id("SASN"),
+            "soft_id": soft["soft_id"],
+            "soft_name": soft["soft_name"],
+            "employee_id": emp["employee_id"],
+            "employee_name": emp["employee_name"],
             "assigned_on": now,
             "returned_on": "",
             "assignment_status": "Assigned",
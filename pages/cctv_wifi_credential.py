@@ -3,6 +3,8 @@ from datetime import datetime
 
 from utils.permissions import admin_only
 from utils.gsheets import read_sheet, append_row
+from utils.constants import CCTV_WIFI_SHEET
+from utils.export import export_csv
 from utils.ui import apply_global_ui
 from utils.auth import logout
 
@@ -15,7 +17,7 @@ logout()
 
 st.title("CCTV / Wi-Fi Credential")
 
-SHEET_NAME = "cctv_wifi_credential"
+SHEET_NAME = CCTV_WIFI_SHEET
 
 # ─────────────────────────────────────────────
 # Load existing data
@@ -160,9 +162,4 @@ else:
 
     st.dataframe(display_df, use_container_width=True)
 
-    st.download_button(
-        "⬇ Download CSV",
-        data=display_df.to_csv(index=False).encode("utf-8"),
-        file_name="cctv_wifi_credentials.csv",
-        mime="text/csv"
-    )
+    export_csv(display_df, "cctv_wifi_credentials.csv", label="⬇ Download CSV")
@@ -2,8 +2,10 @@ import streamlit as st
 from datetime import datetime
 
 from utils.permissions import admin_only
-from utils.gsheets import read_sheet, write_sheet
+from utils.gsheets import read_sheet, update_rows
 from utils.auth import logout
+from utils.pickers import frame_index, picker
+from utils.search_index import sheet_data_version
 
 admin_only()
 logout()
@@ -23,23 +25,40 @@ if active_df.empty:
     st.info("No active software assignments")
     st.stop()
 
-options = active_df.apply(
-    lambda x: f"{x['assignment_id']} | {x['soft_name']} | {x['employee_name']}",
-    axis=1
+# Active assignments, indexed once per version of the sheet
+assignments = frame_index(
+    "software_returns",
+    active_df,
+    "assignment_id",
+    ["assignment_id", "soft_name", "employee_id", "employee_name"],
+    ["assignment_id", "soft_name", "employee_name"],
+    sheet_data_version("software_assignments"),
 )
 
-choice = st.selectbox("Select Assignment", options)
+aid = picker(
+    "Select Assignment",
+    assignments,
+    key="return_software",
+    placeholder="Type an assignment ID, software or employee…",
+)
 return_reason = st.text_input("Return Reason")
 
 if st.button("Return Software"):
-    aid = choice.split(" | ")[0]
-    idx = df[df["assignment_id"] == aid].index
-
-    df.loc[idx, "assignment_status"] = "Returned"
-    df.loc[idx, "returned_on"] = datetime.now().isoformat()
-    df.loc[idx, "remarks"] = return_reason
+    if aid is None:
+        st.warning("Select an assignment to return.")
+        st.stop()
 
-    write_sheet("software_assignments", df)
+    update_rows(
+        "software_assignments",
+        "assignment_id",
+        {
+            aid: {
+                "assignment_status": "Returned",
+                "returned_on": datetime.now().isoformat(),
+                "remarks": return_reason,
+            }
+        },
+    )
 
     st.success("Software returned successfully")
     st.rerun()
@@ -1,10 +1,11 @@
 import streamlit as st
-import duckdb
-import pandas as pd
 
 from utils.permissions import admin_or_manager_only
-from utils.gsheets import read_sheet
-from utils.ui import apply_global_ui
+from utils.gsheets import read_sheets
+from utils.duck import query
+from utils.search_index import search_keys
+from utils.export import export_csv
+from utils.ui import apply_global_ui, show_data_freshness
 from utils.auth import logout
 
 # ─────────────────────────────
@@ -19,9 +20,15 @@ st.title("💻 Assigned Software")
 # ─────────────────────────────
 # Load data
 # ─────────────────────────────
-software_assign_df = read_sheet("software_assignments")
-software_master_df = read_sheet("software_master")
-employee_df = read_sheet("employee_master")
+sheets = read_sheets([
+    "software_assignments",
+    "software_master",
+    "employee_master",
+])
+show_data_freshness(list(sheets))
+software_assign_df = sheets["software_assignments"]
+software_master_df = sheets["software_master"]
+employee_df = sheets["employee_master"]
 
 for df in [software_assign_df, software_master_df, employee_df]:
     if not df.empty:
@@ -35,13 +42,7 @@ if software_assign_df.empty:
 # ─────────────────────────────
 # DuckDB Join
 # ─────────────────────────────
-con = duckdb.connect(database=":memory:")
-
-con.register("software_assign", software_assign_df)
-con.register("software_master", software_master_df)
-con.register("employee", employee_df)
-
-software_df = con.execute("""
+software_df = query("""
 SELECT
     e.employee_id,
     e.employee_name,
@@ -51,11 +52,11 @@ SELECT
     e.department,
     e.location,
     s.assigned_on
-FROM software_assign s
+FROM software_assignments s
 JOIN software_master sm ON s.soft_id = sm.soft_id
-JOIN employee e ON s.employee_id = e.employee_id
+JOIN employee_master e ON s.employee_id = e.employee_id
 WHERE s.assignment_status = 'Assigned'
-""").df()
+""", sheets=list(sheets))
 
 if software_df.empty:
     st.info("No assigned software found.")
@@ -69,7 +70,7 @@ st.subheader("🔍 Filters")
 c1, c2, c3 = st.columns(3)
 
 with c1:
-    search = st.text_input("Search Employee (ID / Name)")
+    search = st.text_input("Search Employee (ID / Name)").strip()
 
 with c2:
     dept_filter = st.selectbox(
@@ -84,10 +85,8 @@ with c3:
     )
 
 if search:
-    software_df = software_df[
-        software_df["employee_id"].str.contains(search, case=False, na=False)
-        | software_df["employee_name"].str.contains(search, case=False, na=False)
-    ]
+    matches = search_keys("employees", search)
+    software_df = software_df[software_df["employee_id"].isin(matches)]
 
 if dept_filter != "All":
     software_df = software_df[software_df["department"] == dept_filter]
@@ -128,9 +127,8 @@ st.dataframe(
 # ─────────────────────────────
 # Export
 # ─────────────────────────────
-st.download_button(
-    "⬇ Download CSV",
-    data=software_df[display_cols].to_csv(index=False),
-    file_name="assigned_software.csv",
-    mime="text/csv",
+export_csv(
+    software_df[display_cols],
+    "assigned_software.csv",
+    label="⬇ Download CSV",
 )
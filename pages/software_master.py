@@ -3,6 +3,7 @@ from datetime import datetime
 
 from utils.permissions import admin_only
 from utils.gsheets import read_sheet, append_row
+from utils.ids import next_id
 from utils.auth import logout
 
 admin_only()
@@ -16,20 +17,6 @@ df = read_sheet(SHEET_NAME)
 if not df.empty:
     df.columns = df.columns.str.strip().str.lower()
 
-# ─────────────────────────────────────────────
-# Generate soft_id
-# ─────────────────────────────────────────────
-def next_soft_id(df):
-    if df.empty:
-        return "SOFT-001"
-    nums = (
-        df["soft_id"]
-        .astype(str)
-        .str.replace("SOFT-", "", regex=False)
-        .astype(int)
-    )
-    return f"SOFT-{str(nums.max()+1).zfill(3)}"
-
 # ─────────────────────────────────────────────
 # Entry Form
 # ─────────────────────────────────────────────
@@ -62,7 +49,7 @@ if submit:
     append_row(
         SHEET_NAME,
         {
-            "soft_id": next_soft_id(df),
+            "soft_id": next_id("SOFT"),
             "soft_name": soft_name,
             "status": status,
             "monthly_price": monthly_price,
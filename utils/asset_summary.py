@@ -0,0 +1,213 @@
+# utils/asset_summary.py
+
+import threading
+import time
+
+import pandas as pd
+import streamlit as st
+
+from utils.constants import ASSETS_MASTER_SHEET, ASSET_ASSIGNMENTS_SHEET, ASSET_ASSIGNED
+from utils.gsheets import read_sheets
+from utils.settings import get_setting
+
+SUMMARY_COLUMNS = [
+    "category",
+    "total_qty",
+    "out_of_service_qty",
+    "total_assigned",
+    "available_qty",
+    "location",
+]
+
+# Category × location counts for the dashboard, kept up to date in memory.
+#
+# The summary is built from the sheets once, then the asset pages report
+# create / assign / return / deactivate events and only the affected cell
+# changes. Events carry absolute per-asset state (assigned or not, active or
+# not), so applying one twice is harmless. That lets a rebuild replay the
+# events that arrived while it was reading the sheets without double
+# counting. Every reconcile_seconds the whole thing is rebuilt from the
+# sheets to pick up edits made outside the app.
+class AssetSummary:
+    def __init__(self, reconcile_seconds: float):
+        self.reconcile_seconds = reconcile_seconds
+
+        self._lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+        self._assets = {}       # asset_id -> [category, location, active, assigned]
+        self._cells = {}        # (category, location) -> [total, out_of_service, assigned]
+        self._built_at = None
+        self._replay = None     # events seen during a rebuild
+
+    # ─────────────────────────────────────────
+    # Full build
+    # ─────────────────────────────────────────
+    def rebuild(self):
+        with self._rebuild_lock:
+            self._rebuild()
+
+    def _rebuild(self):
+        with self._lock:
+            self._replay = []
+
+        try:
+            sheets = read_sheets([ASSETS_MASTER_SHEET, ASSET_ASSIGNMENTS_SHEET])
+            assets = self._build(sheets[ASSETS_MASTER_SHEET], sheets[ASSET_ASSIGNMENTS_SHEET])
+        except Exception:
+            with self._lock:
+                self._replay = None
+            raise
+
+        with self._lock:
+            replay, self._replay = self._replay, None
+            self._assets, self._cells = {}, {}
+            for asset_id, state in assets.items():
+                self._set(asset_id, *state)
+            for event in replay:
+                self._apply(*event)
+            self._built_at = time.monotonic()
+
+    @staticmethod
+    def _build(assets_df: pd.DataFrame, assignments_df: pd.DataFrame) -> dict:
+        if assets_df.empty or "asset_id" not in assets_df.columns:
+            return {}
+
+        assigned_ids = set()
+        if {"asset_id", "assignment_status"} <= set(assignments_df.columns):
+            assigned_ids = set(
+                assignments_df.loc[
+                    assignments_df["assignment_status"] == ASSET_ASSIGNED, "asset_id"
+                ]
+            )
+
+        df = pd.DataFrame({
+            "asset_id": assets_df["asset_id"],
+            "category": assets_df.get("category"),
+            "location": assets_df.get("location"),
+            # Only an explicit FALSE is out of service, same as the old query
+            "active": ~assets_df["is_active"].eq(False).fillna(False)
+            if "is_active" in assets_df.columns else True,
+        })
+        df["assigned"] = df["asset_id"].isin(assigned_ids)
+
+        # Blank labels become None so they all land in one cell (NaN != NaN)
+        for col in ["category", "location"]:
+            df[col] = df[col].astype(object).where(df[col].notna(), None)
+
+        return {
+            row.asset_id: (row.category, row.location, bool(row.active), bool(row.assigned))
+            for row in df.itertuples(index=False)
+        }
+
+    def _is_stale(self) -> bool:
+        built_at = self._built_at
+        return built_at is None or time.monotonic() - built_at > self.reconcile_seconds
+
+    def ensure_fresh(self):
+        if not self._is_stale():
+            return
+        with self._rebuild_lock:
+            # Another session may have rebuilt while we waited
+            if self._is_stale():
+                self._rebuild()
+
+    # ─────────────────────────────────────────
+    # Deltas
+    # ─────────────────────────────────────────
+    def _set(self, asset_id, category, location, active: bool, assigned: bool):
+        old = self._assets.get(asset_id)
+        if old is not None:
+            cell = self._cells[(old[0], old[1])]
+            cell[0] -= 1
+            cell[1] -= not old[2]
+            cell[2] -= old[3]
+
+        self._assets[asset_id] = [category, location, active, assigned]
+        cell = self._cells.setdefault((category, location), [0, 0, 0])
+        cell[0] += 1
+        cell[1] += not active
+        cell[2] += assigned
+
+    def _apply(self, event: str, asset_id, fields: dict):
+        old = self._assets.get(asset_id)
+        if event == "created":
+            if old is None:
+                self._set(asset_id, fields.get("category"), fields.get("location"),
+                          fields.get("active", True), False)
+        elif old is not None:
+            category, location, active, assigned = old
+            self._set(
+                asset_id, category, location,
+                fields.get("active", active),
+                fields.get("assigned", assigned),
+            )
+
+    def record(self, event: str, asset_id, **fields):
+        with self._lock:
+            if self._built_at is None and self._replay is None:
+                return  # nothing built yet; the first build reads the sheets
+            self._apply(event, asset_id, fields)
+            if self._replay is not None:
+                self._replay.append((event, asset_id, fields))
+
+    # ─────────────────────────────────────────
+    # Reads (size of the summary, not the inventory)
+    # ─────────────────────────────────────────
+    def frame(self) -> pd.DataFrame:
+        with self._lock:
+            rows = [
+                (category, total, oos, assigned, total - oos - assigned, location)
+                for (category, location), (total, oos, assigned) in self._cells.items()
+                if total
+            ]
+        df = pd.DataFrame(rows, columns=SUMMARY_COLUMNS)
+        return df.sort_values(["category", "location"], ignore_index=True)
+
+    def totals(self) -> dict:
+        with self._lock:
+            total = oos = assigned = 0
+            for cell_total, cell_oos, cell_assigned in self._cells.values():
+                total += cell_total
+                oos += cell_oos
+                assigned += cell_assigned
+        return {
+            "total_qty": total,
+            "out_of_service_qty": oos,
+            "total_assigned": assigned,
+            "available_qty": total - oos - assigned,
+        }
+
+@st.cache_resource
+def _get_summary():
+    return AssetSummary(
+        reconcile_seconds=float(get_setting("data", "summary_reconcile_seconds", 900)),
+    )
+
+def get_asset_summary() -> pd.DataFrame:
+    summary = _get_summary()
+    summary.ensure_fresh()
+    return summary.frame()
+
+def get_asset_kpis() -> dict:
+    summary = _get_summary()
+    summary.ensure_fresh()
+    return summary.totals()
+
+def record_assets_created(rows: list[dict]):
+    summary = _get_summary()
+    for row in rows:
+        summary.record(
+            "created", row["asset_id"],
+            category=row.get("category"),
+            location=row.get("location"),
+            active=row.get("is_active", True) is not False,
+        )
+
+def record_asset_assigned(asset_id: str):
+    _get_summary().record("assigned", asset_id, assigned=True)
+
+def record_asset_returned(asset_id: str, deactivated: bool = False):
+    fields = {"assigned": False}
+    if deactivated:
+        fields["active"] = False
+    _get_summary().record("returned", asset_id, **fields)
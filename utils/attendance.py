@@ -0,0 +1,588 @@
+# utils/attendance.py
+
+import glob
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import date, timedelta
+from urllib.parse import quote
+
+import duckdb
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from utils.search_index import build_index, get_index
+from utils.settings import get_setting
+
+# Public Google Sheet export with the raw attendance logs
+SHEET_ID = "1FVjiK9Y-AhrogECD6Q8tRZpPiSxOFMevlMKGQWTGsHI"
+SHEET_NAME = "odata"
+CSV_URL = f"https://docs.google.com/spreadsheets/d/{SHEET_ID}/gviz/tq?tqx=out:csv&sheet={SHEET_NAME}"
+
+# ─────────────────────────────────────────────
+# Derived columns (computed once per row, at ingest)
+# ─────────────────────────────────────────────
+WORK_BANDS = ["⚪ NA", "🟢 Full", "🟡 Partial", "🔴 Low"]
+WORK_BAND_DTYPE = pd.CategoricalDtype(WORK_BANDS)
+
+# "09:05", "9:05:30", "6:10 PM", "2024-05-01 18:10:00" -> minutes since midnight
+_TIME_RE = r"(\d{1,2}):(\d{2})(?::\d{2})?\s*([AaPp][Mm])?"
+
+def minute_of_day(values: pd.Series) -> pd.Series:
+    # A log only has a few hundred distinct clock times, so parse each one
+    # once and broadcast back through the factorize codes.
+    codes, uniques = pd.factorize(values)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(_TIME_RE)
+
+    hours = pd.to_numeric(parts[0], errors="coerce")
+    minutes = pd.to_numeric(parts[1], errors="coerce")
+    meridiem = parts[2].str.upper()
+    hours = hours.where(~((meridiem == "PM") & (hours < 12)), hours + 12)
+    hours = hours.where(~((meridiem == "AM") & (hours == 12)), 0)
+
+    total = hours * 60 + minutes
+    total = total.where((hours < 24) & (minutes < 60))
+    parsed = pd.array(total, dtype="Int16")
+    return pd.Series(parsed.take(codes, allow_fill=True), index=values.index)
+
+def derive(df: pd.DataFrame, late_after: int, early_before: int) -> pd.DataFrame:
+    # work_band    Full (>= 8h) / Partial (>= 4h) / Low / NA, as a Categorical
+    # in_minute    first_in_time as minutes since midnight (Int16)
+    # out_minute   last_out_time as minutes since midnight (Int16)
+    # is_late      arrived after late_after
+    # is_early_leave  left before early_before
+    hours = df["work_hours"].to_numpy(dtype="float64", na_value=np.nan)
+    band = np.select([np.isnan(hours), hours >= 8, hours >= 4], [0, 1, 2], 3)
+    df["work_band"] = pd.Categorical.from_codes(band, dtype=WORK_BAND_DTYPE)
+
+    missing = pd.Series(None, index=df.index, dtype=object)
+    df["in_minute"] = minute_of_day(df.get("first_in_time", missing))
+    df["out_minute"] = minute_of_day(df.get("last_out_time", missing))
+
+    df["is_late"] = (df["in_minute"] > late_after).fillna(False).astype(bool)
+    df["is_early_leave"] = (df["out_minute"] < early_before).fillna(False).astype(bool)
+    return df
+
+# ─────────────────────────────────────────────
+# Rollups (built at ingest, see AttendanceStore._write_rollups)
+# ─────────────────────────────────────────────
+ROLLUP_VERSION = 1
+
+ROLLUP_GRAINS = {
+    "day": "CAST(log_date AS DATE)",
+    "week": "CAST(date_trunc('week', log_date) AS DATE)",
+    "month": "CAST(date_trunc('month', log_date) AS DATE)",
+}
+
+ROLLUP_KEYS = {
+    "employee": ["empid", "user_type"],
+    "user_type": ["user_type"],
+}
+
+# Stored as sums so partial rows (a week split across two months, several
+# employees of one user_type) can be added up again when read
+ROLLUP_MEASURES = f"""
+    count(*) AS days,
+    count(*) FILTER (WHERE day_status ILIKE 'present%') AS present_days,
+    count(*) FILTER (WHERE day_status ILIKE 'absent%') AS absent_days,
+    count(*) FILTER (
+        WHERE nullif(trim(CAST(leave_status AS VARCHAR)), '') IS NOT NULL
+    ) AS leave_days,
+    count(*) FILTER (WHERE work_band = '{WORK_BANDS[3]}') AS low_hours_days,
+    coalesce(sum(work_hours), 0) AS total_hours,
+    count(work_hours) AS hours_days
+"""
+
+SUMMARY_MEASURES = [
+    "days",
+    "present_days",
+    "absent_days",
+    "leave_days",
+    "low_hours_days",
+    "total_hours",
+    "mean_hours",
+]
+
+def _clock(text: str) -> int:
+    value = minute_of_day(pd.Series([text])).iloc[0]
+    if pd.isna(value):
+        raise ValueError(f"Not a time of day: {text!r}")
+    return int(value)
+
+# Where the raw attendance rows come from: the Google Sheets CSV export, or
+# a local CSV file with the same columns (handy for testing ingest).
+class AttendanceSource:
+    def __init__(self, location: str):
+        self.location = location
+
+    def fetch(self, offset: int = 0) -> pd.DataFrame:
+        # Data rows from `offset` on (0 = the whole export)
+        if not self.location.startswith(("http://", "https://")):
+            return pd.read_csv(self.location, skiprows=range(1, offset + 1))
+
+        if not offset:
+            return pd.read_csv(self.location)
+        # Google Visualization query: skip rows server-side
+        return pd.read_csv(
+            f"{self.location}&headers=1&tq={quote(f'select * offset {offset}')}"
+        )
+
+# Attendance is kept on disk as one Parquet file per month of log_date:
+#
+#   <root>/log_month=2024-05/data.parquet
+#
+# and queried with DuckDB straight from the files. All dashboard filters end
+# up in one WHERE clause, and the selected date range becomes a literal
+# filter on log_month so DuckDB only opens the months in range.
+#
+# Ingest is incremental. Every stored row keeps its row number in the export
+# (_row), and <root>/_ingest_state.json remembers how many rows were read and
+# the first row of the last recheck_days. A refresh fetches only the export
+# from that row on, and rewrites just the months those rows fall in: the
+# older rows of each such month are kept and the refetched ones replace the
+# rest. Late corrections to recent days are picked up that way. If the
+# export shrank, or every full_refresh_seconds, the whole export is reloaded.
+class AttendanceStore:
+    def __init__(
+        self,
+        root: str,
+        source: AttendanceSource,
+        refresh_seconds: float,
+        recheck_days: int = 7,
+        full_refresh_seconds: float = 86400,
+        late_after: str = "09:30",
+        early_before: str = "17:30",
+    ):
+        self.root = root
+        self.source = source
+        self.refresh_seconds = refresh_seconds
+        self.recheck_days = recheck_days
+        self.full_refresh_seconds = full_refresh_seconds
+        self.late_after = _clock(late_after)
+        self.early_before = _clock(early_before)
+
+        self._con = duckdb.connect(database=":memory:")
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._refreshed_at = None
+
+        os.makedirs(root, exist_ok=True)
+
+    def _cursor(self):
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self._con.cursor()
+        return cursor
+
+    # ─────────────────────────────────────────
+    # Ingest state
+    # ─────────────────────────────────────────
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.root, "_ingest_state.json")
+
+    @property
+    def _derivation(self) -> list:
+        # Stored derived columns are only valid for these settings
+        return [WORK_BANDS, self.late_after, self.early_before, ROLLUP_VERSION]
+
+    def version(self):
+        # Changes whenever an ingest rewrites anything
+        state = self._load_state()
+        return state and state.get("ingested_at")
+
+    def _load_state(self) -> dict | None:
+        try:
+            with open(self._state_path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, rows: int, full_at: float):
+        state = {
+            "rows": rows,
+            "full_at": full_at,
+            "recheck_from_row": rows,
+            "derivation": self._derivation,
+            "ingested_at": time.time_ns(),
+        }
+
+        bounds = self.bounds()
+        if bounds:
+            cutoff = bounds[1] - timedelta(days=self.recheck_days)
+            first = self._cursor().execute(
+                f"SELECT MIN(_row) FROM {self._dataset()} "
+                f"WHERE log_month >= '{cutoff:%Y-%m}' AND log_date >= ?",
+                [cutoff],
+            ).fetchone()[0]
+            if first is not None:
+                state["recheck_from_row"] = int(first)
+            state["max_date"] = bounds[1].isoformat()
+
+        with open(f"{self._state_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(f"{self._state_path}.tmp", self._state_path)
+
+    # ─────────────────────────────────────────
+    # Ingest
+    # ─────────────────────────────────────────
+    def _month_path(self, month: str, root: str | None = None) -> str:
+        return os.path.join(root or self.root, f"log_month={month}", "data.parquet")
+
+    def months(self) -> list[str]:
+        return sorted(
+            name.split("=", 1)[1]
+            for name in os.listdir(self.root)
+            if name.startswith("log_month=")
+            and os.path.exists(os.path.join(self.root, name, "data.parquet"))
+        )
+
+    def _prepare(self, df: pd.DataFrame, offset: int) -> pd.DataFrame:
+        df = df.copy()
+        df.columns = df.columns.str.strip()
+        df["_row"] = range(offset, offset + len(df))
+        df["log_date"] = pd.to_datetime(df["log_date"], errors="coerce")
+        df["work_hours"] = pd.to_numeric(df["work_hours"], errors="coerce")
+
+        # Rows without a date never matched the date filter; nowhere to file them
+        df = df[df["log_date"].notna()].copy()
+        df["log_month"] = df["log_date"].dt.strftime("%Y-%m")
+        return derive(df, self.late_after, self.early_before)
+
+    def _write_months(self, select_sql: str, root: str | None = None) -> set:
+        # One partitioned COPY into a staging directory, then each month's
+        # file is swapped in atomically so queries never see a half-written
+        # month. Returns the months written.
+        staging = os.path.join(root or self.root, f".staging-{time.time_ns()}")
+        cursor = self._cursor()
+        written = set()
+        try:
+            cursor.execute(
+                f"COPY ({select_sql}) TO '{staging}' "
+                "(FORMAT PARQUET, PARTITION_BY (log_month))"
+            )
+            if not os.path.isdir(staging):
+                return written
+
+            for part in os.listdir(staging):
+                month = part.split("=", 1)[1]
+                files = sorted(glob.glob(os.path.join(staging, part, "*.parquet")))
+                path = self._month_path(month, root)
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+
+                if len(files) == 1:
+                    os.replace(files[0], path)
+                else:
+                    cursor.execute(
+                        f"COPY (SELECT * FROM read_parquet({files!r})) "
+                        f"TO '{path}.tmp' (FORMAT PARQUET)"
+                    )
+                    os.replace(f"{path}.tmp", path)
+                written.add(month)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return written
+
+    def _remove_months(self, months, root: str | None = None):
+        for month in months:
+            shutil.rmtree(os.path.dirname(self._month_path(month, root)), ignore_errors=True)
+
+    def ingest(self, df: pd.DataFrame):
+        # Full replace: every month in df is rewritten, months not in df removed
+        rows = len(df)
+        df = self._prepare(df, 0)
+
+        cursor = self._cursor()
+        cursor.register("_incoming", df)
+        try:
+            written = self._write_months("SELECT * FROM _incoming")
+        finally:
+            cursor.unregister("_incoming")
+
+        self._remove_months(set(self.months()) - written)
+        self._write_rollups(written, replace_all=True)
+        self._save_state(rows, full_at=time.time())
+
+    def ingest_tail(self, tail: pd.DataFrame, offset: int, state: dict):
+        # tail holds export rows offset.. and replaces what was stored for them
+        old_months = []
+        if self.months():
+            old_months = [
+                month for (month,) in self._cursor().execute(
+                    f"SELECT DISTINCT log_month FROM {self._dataset()} WHERE _row >= ?",
+                    [offset],
+                ).fetchall()
+            ]
+
+        tail = self._prepare(tail, offset)
+        affected = sorted(set(old_months) | set(tail["log_month"]))
+        if not affected:
+            self._save_state(offset + len(tail), state["full_at"])
+            return
+
+        kept = ""
+        existing = [m for m in affected if os.path.exists(self._month_path(m))]
+        if existing:
+            files = [self._month_path(m) for m in existing]
+            kept = (
+                f"SELECT * FROM read_parquet({files!r}, hive_partitioning = true, "
+                f"union_by_name = true) WHERE _row < {int(offset)} UNION ALL BY NAME "
+            )
+
+        cursor = self._cursor()
+        cursor.register("_incoming", tail)
+        try:
+            written = self._write_months(f"{kept}SELECT * FROM _incoming")
+        finally:
+            cursor.unregister("_incoming")
+
+        self._remove_months(set(existing) - written)
+        self._write_rollups(set(affected))
+        self._save_state(offset + len(tail), state["full_at"])
+
+    def refresh(self, force: bool = False):
+        with self._lock:
+            if (
+                not force
+                and self._refreshed_at is not None
+                and time.monotonic() - self._refreshed_at < self.refresh_seconds
+            ):
+                return
+
+            try:
+                self._refresh(force)
+            except Exception:
+                # Source unreachable: keep answering from what is on disk
+                if not self.months():
+                    raise
+            self._refreshed_at = time.monotonic()
+
+    def _refresh(self, force: bool):
+        state = self._load_state()
+        if (
+            force
+            or state is None
+            or state.get("derivation") != self._derivation
+            or not self.months()
+            or time.time() - state["full_at"] > self.full_refresh_seconds
+        ):
+            self.ingest(self.source.fetch())
+            return
+
+        offset = state["recheck_from_row"]
+        tail = self.source.fetch(offset)
+
+        if offset + len(tail) < state["rows"]:
+            # Rows disappeared from the export: not an append, start over
+            self.ingest(self.source.fetch())
+            return
+
+        self.ingest_tail(tail, offset, state)
+
+    # ─────────────────────────────────────────
+    # Rollups
+    # ─────────────────────────────────────────
+    def _rollup_root(self, grain: str) -> str:
+        return os.path.join(self.root, "rollups", grain)
+
+    def _write_rollups(self, months, replace_all: bool = False):
+        # Rebuild the rollups of the given months from the stored rows. They
+        # are partitioned by log_month like the rows, so an incremental ingest
+        # only recomputes the months it rewrote. A week spanning two months
+        # is stored as two partial rows and summed back together on read.
+        months = sorted(months)
+        for grain, period in ROLLUP_GRAINS.items():
+            root = self._rollup_root(grain)
+            os.makedirs(root, exist_ok=True)
+
+            written = set()
+            if months:
+                written = self._write_months(
+                    f"""
+                    SELECT
+                        {period} AS period,
+                        empid,
+                        user_type,
+                        log_month,
+                        max(employee_fname) AS employee_fname,
+                        max(employee_lname) AS employee_lname,
+                        {ROLLUP_MEASURES}
+                    FROM {self._dataset()}
+                    WHERE log_month IN ({", ".join(f"'{m}'" for m in months)})
+                    GROUP BY ALL
+                    """,
+                    root,
+                )
+
+            stored = {
+                name.split("=", 1)[1]
+                for name in os.listdir(root) if name.startswith("log_month=")
+            }
+            stale = stored - written if replace_all else set(months) - written
+            self._remove_months(stale, root)
+
+    def summary(
+        self,
+        grain: str,
+        by: str,
+        start: date,
+        end: date,
+        user_type: list,
+        empids: list | None = None,
+    ) -> pd.DataFrame:
+        # Answered from the rollups: a GROUP BY over a few rows per employee
+        # and period instead of a scan of the raw logs.
+        keys = ROLLUP_KEYS[by]
+        names = ""
+        if by == "employee":
+            names = "max(employee_fname) AS employee_fname, max(employee_lname) AS employee_lname,"
+        pattern = os.path.join(self._rollup_root(grain), "log_month=*", "data.parquet")
+        if not glob.glob(pattern):
+            columns = ["period", *keys, *SUMMARY_MEASURES]
+            if by == "employee":
+                columns[2:2] = ["employee_fname", "employee_lname"]
+            return pd.DataFrame(columns=columns)
+
+        # Periods that overlap [start, end]: a week or month starting before
+        # `start` still counts
+        first = self._cursor().execute(
+            f"SELECT {ROLLUP_GRAINS[grain].replace('log_date', 'CAST(? AS DATE)')}",
+            [start],
+        ).fetchone()[0]
+
+        sql = f"""
+        SELECT
+            period,
+            {", ".join(keys)},
+            {names}
+            CAST(sum(days) AS BIGINT) AS days,
+            CAST(sum(present_days) AS BIGINT) AS present_days,
+            CAST(sum(absent_days) AS BIGINT) AS absent_days,
+            CAST(sum(leave_days) AS BIGINT) AS leave_days,
+            CAST(sum(low_hours_days) AS BIGINT) AS low_hours_days,
+            round(sum(total_hours), 2) AS total_hours,
+            round(sum(total_hours) / nullif(sum(hours_days), 0), 2) AS mean_hours
+        FROM read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)
+        WHERE log_month BETWEEN '{first:%Y-%m}' AND '{end:%Y-%m}'
+          AND period BETWEEN ? AND ?
+          AND list_contains(?, user_type)
+        """
+        params = [first, end, list(user_type)]
+
+        if empids is not None and by == "employee":
+            sql += " AND list_contains(?, empid)"
+            params.append(list(empids))
+
+        sql += f" GROUP BY ALL ORDER BY period DESC, {', '.join(keys)}"
+        return self._cursor().execute(sql, params).df()
+
+    # ─────────────────────────────────────────
+    # Queries
+    # ─────────────────────────────────────────
+    def _dataset(self) -> str:
+        pattern = os.path.join(self.root, "log_month=*", "data.parquet")
+        return f"read_parquet('{pattern}', hive_partitioning = true, union_by_name = true)"
+
+    def bounds(self) -> tuple[date, date] | None:
+        if not self.months():
+            return None
+        first, last = self._cursor().execute(
+            f"SELECT MIN(log_date), MAX(log_date) FROM {self._dataset()}"
+        ).fetchone()
+        return first.date(), last.date()
+
+    def employees(self) -> pd.DataFrame:
+        # One row per empid, latest name, for the search index
+        if not self.months():
+            return pd.DataFrame(columns=["empid", "employee_fname", "employee_lname"])
+        return self._cursor().execute(
+            f"""
+            SELECT
+                empid,
+                arg_max(employee_fname, log_date) AS employee_fname,
+                arg_max(employee_lname, log_date) AS employee_lname
+            FROM {self._dataset()}
+            GROUP BY empid
+            """
+        ).df()
+
+    def distinct(self, column: str) -> list:
+        if not self.months():
+            return []
+        rows = self._cursor().execute(
+            f'SELECT DISTINCT "{column}" FROM {self._dataset()} '
+            f'WHERE "{column}" IS NOT NULL ORDER BY 1'
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    def query(
+        self,
+        start: date,
+        end: date,
+        day_status: list,
+        leave_status: list,
+        user_type: list,
+        empids: list | None = None,
+        columns: list | None = None,
+    ) -> pd.DataFrame:
+        if not self.months():
+            return pd.DataFrame(columns=columns or [])
+
+        select = (
+            ", ".join(f'"{c}"' for c in columns) if columns
+            else "* EXCLUDE (log_month, _row)"
+        )
+
+        # Month bounds are inlined (not parameters) so partition pruning applies
+        sql = f"""
+        SELECT {select}
+        FROM {self._dataset()}
+        WHERE log_month BETWEEN '{start:%Y-%m}' AND '{end:%Y-%m}'
+          AND log_date >= ? AND log_date < ? + INTERVAL 1 DAY
+          AND list_contains(?, day_status)
+          AND list_contains(?, leave_status)
+          AND list_contains(?, user_type)
+        """
+        params = [start, end, list(day_status), list(leave_status), list(user_type)]
+
+        if empids is not None:
+            sql += " AND list_contains(?, empid)"
+            params.append(list(empids))
+
+        df = self._cursor().execute(sql, params).df()
+        # Parquet hands the band back as text
+        if "work_band" in df.columns:
+            df["work_band"] = df["work_band"].astype(WORK_BAND_DTYPE)
+        return df
+
+@st.cache_resource
+def _get_store():
+    return AttendanceStore(
+        root=get_setting("attendance", "store_path", "data/attendance"),
+        source=AttendanceSource(get_setting("attendance", "csv_url", CSV_URL)),
+        refresh_seconds=float(get_setting("attendance", "refresh_seconds", 600)),
+        recheck_days=int(get_setting("attendance", "recheck_days", 7)),
+        full_refresh_seconds=float(get_setting("attendance", "full_refresh_seconds", 86400)),
+        late_after=get_setting("attendance", "late_after", "09:30"),
+        early_before=get_setting("attendance", "early_before", "17:30"),
+    )
+
+def search_employees(store: AttendanceStore, text: str) -> list:
+    # empids matching the search box, from an index rebuilt once per ingest
+    index = get_index(
+        f"attendance:{store.root}",
+        store.version(),
+        lambda: build_index(
+            store.employees(), "empid", ["empid", "employee_fname", "employee_lname"]
+        ),
+    )
+    return index.search(text)
+
+def get_attendance_store() -> AttendanceStore:
+    store = _get_store()
+    store.refresh()
+    return store
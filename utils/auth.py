@@ -23,7 +23,7 @@ def login():
         user = users[
             (users["email"] == email)
             & (users["password"] == password)
-            & (users["is_active"].astype(str).str.lower() == "true")
+            & users["is_active"].fillna(False)
         ]
 
         if user.empty:
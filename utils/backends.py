@@ -0,0 +1,551 @@
+# utils/backends.py
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+import streamlit as st
+import pandas as pd
+import gspread
+from gspread.utils import (
+    absolute_range_name,
+    fill_gaps,
+    numericise_all,
+    rowcol_to_a1,
+)
+from google.oauth2.service_account import Credentials
+
+from utils.scheduler import RequestScheduler
+from utils.settings import get_setting
+
+SCOPES = [
+    "https://www.googleapis.com/auth/spreadsheets",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# ─────────────────────────────────────────────
+# Shared shaping
+# ─────────────────────────────────────────────
+def values_to_frame(values: list) -> pd.DataFrame:
+    # Same shaping as Worksheet.get_all_records(): header row as keys,
+    # short rows padded, numeric-looking strings numericised
+    if not values or values == [[]]:
+        return pd.DataFrame()
+
+    values = fill_gaps(values)
+    header = values[0]
+    records = [dict(zip(header, numericise_all(row))) for row in values[1:]]
+    # A header-only sheet still has its columns
+    df = pd.DataFrame(records) if records else pd.DataFrame(columns=list(dict.fromkeys(header)))
+
+    df.columns = df.columns.astype(str).str.strip().str.lower()
+    return df
+
+def to_cell(value) -> str:
+    if value is None or value is pd.NA or value is pd.NaT:
+        return ""
+    if isinstance(value, float) and pd.isna(value):
+        return ""
+    if isinstance(value, pd.Timestamp):
+        # Typed date columns go back in the form they were entered
+        return value.date().isoformat() if value == value.normalize() else value.isoformat()
+    return str(value)
+
+def frame_values(df: pd.DataFrame) -> list:
+    # Header row plus cell strings: blanks stay blank and typed dates / bools
+    # go back in the same form as appended and updated cells
+    return [df.columns.tolist()] + [
+        [to_cell(v) for v in row] for row in df.itertuples(index=False)
+    ]
+
+# ─────────────────────────────────────────────
+# Backend interface
+# ─────────────────────────────────────────────
+# Every backend stores named sheets: a header row followed by rows of cell
+# strings. Reads come back through values_to_frame() so all backends return
+# identically shaped DataFrames.
+class StorageBackend:
+    # True when read_sheets() fetches several sheets in one request
+    batch_reads = False
+
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        raise NotImplementedError
+
+    def read_sheets(self, sheet_names: list[str]) -> dict[str, pd.DataFrame]:
+        return {name: self.read_sheet(name) for name in sheet_names}
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def append_rows(self, sheet_name: str, rows: list[dict], chunk_size: int):
+        raise NotImplementedError
+
+    def update_rows(self, sheet_name: str, key_column: str, changes: dict):
+        # changes: {key value: {column: new value}}, already reduced to the
+        # cells that differ from what the caller last read
+        raise NotImplementedError
+
+    def refresh(self, sheet_name: str | None = None):
+        pass
+
+    def authoritative(self) -> "StorageBackend":
+        # The store writes land in first; a local replica answers with its source
+        return self
+
+    def is_sheet_error(self, exc: Exception) -> bool:
+        # True when a failed read_sheets() was caused by one sheet (missing
+        # worksheet, bad range) rather than the backend as a whole (quota, 5xx)
+        return False
+
+    def last_synced(self, sheet_name: str):
+        # Backends that serve a local copy report when it was last refreshed
+        return None
+
+# ─────────────────────────────────────────────
+# Google Sheets
+# ─────────────────────────────────────────────
+@st.cache_resource
+def _get_client():
+    creds = Credentials.from_service_account_info(
+        st.secrets["gcp_service_account"],
+        scopes=SCOPES
+    )
+    return gspread.authorize(creds)
+
+# Opening the spreadsheet and looking up a worksheet are metadata round trips
+# of their own, and so is reading the header row. All three are kept here and
+# re-fetched after refresh() or a 403/404 from the API; headers also expire
+# after header_ttl_seconds and are re-read when a write names a column the
+# cached header lacks, so columns added or moved by hand are picked up.
+class _HandlePool:
+    def __init__(
+        self,
+        spreadsheet_id: str,
+        scheduler: RequestScheduler,
+        header_ttl_seconds: float = 300,
+    ):
+        self.spreadsheet_id = spreadsheet_id
+        self.scheduler = scheduler
+        self.header_ttl_seconds = header_ttl_seconds
+
+        self._lock = threading.Lock()
+        self._spreadsheet = None
+        self._worksheets = {}
+        self._headers = {}      # sheet -> (header, fetched_at)
+
+    def spreadsheet(self):
+        with self._lock:
+            if self._spreadsheet is not None:
+                return self._spreadsheet
+
+        sh = self.scheduler.read(
+            lambda: _get_client().open_by_key(self.spreadsheet_id),
+            key=("open", self.spreadsheet_id),
+        )
+        with self._lock:
+            if self._spreadsheet is None:
+                self._spreadsheet = sh
+            return self._spreadsheet
+
+    def worksheet(self, sheet_name: str):
+        with self._lock:
+            ws = self._worksheets.get(sheet_name)
+        if ws is not None:
+            return ws
+
+        sh = self.spreadsheet()
+        ws = self.scheduler.read(
+            lambda: sh.worksheet(sheet_name),
+            key=("worksheet", sheet_name),
+        )
+        with self._lock:
+            return self._worksheets.setdefault(sheet_name, ws)
+
+    def header(self, sheet_name: str, columns=()) -> list:
+        # columns: names the caller is about to write; a cached header
+        # missing any of them is treated as stale
+        with self._lock:
+            entry = self._headers.get(sheet_name)
+        if entry is not None:
+            header, fetched_at = entry
+            known = {str(c).strip().lower() for c in header}
+            if (
+                time.monotonic() - fetched_at <= self.header_ttl_seconds
+                and all(str(c).strip().lower() in known for c in columns)
+            ):
+                return header
+
+        ws = self.worksheet(sheet_name)
+        header = self.scheduler.read(
+            lambda: ws.row_values(1),
+            key=("header", sheet_name),
+        )
+        self.set_header(sheet_name, header)
+        return header
+
+    def set_header(self, sheet_name: str, header: list):
+        with self._lock:
+            self._headers[sheet_name] = (list(header), time.monotonic())
+
+    def refresh(self, sheet_name: str | None = None):
+        with self._lock:
+            if sheet_name is None:
+                self._spreadsheet = None
+                self._worksheets.clear()
+                self._headers.clear()
+            else:
+                self._worksheets.pop(sheet_name, None)
+                self._headers.pop(sheet_name, None)
+
+def _is_stale_handle_error(exc: Exception) -> bool:
+    if isinstance(exc, gspread.exceptions.WorksheetNotFound):
+        return True
+    if isinstance(exc, gspread.exceptions.APIError):
+        return exc.response.status_code in (403, 404)
+    return False
+
+class GoogleSheetsBackend(StorageBackend):
+    batch_reads = True
+
+    def __init__(
+        self,
+        spreadsheet_id: str,
+        scheduler: RequestScheduler,
+        header_ttl_seconds: float = 300,
+    ):
+        self._scheduler = scheduler
+        self._pool = _HandlePool(spreadsheet_id, scheduler, header_ttl_seconds)
+
+    def _with_handles(self, fn):
+        try:
+            return fn(self._pool)
+        except gspread.exceptions.GSpreadException as e:
+            if not _is_stale_handle_error(e):
+                raise
+
+        # Handle went stale (sheet recreated, permissions changed): reopen once
+        self._pool.refresh()
+        return fn(self._pool)
+
+    def _with_worksheet(self, sheet_name: str, fn):
+        return self._with_handles(
+            lambda pool: fn(pool, pool.worksheet(sheet_name))
+        )
+
+    def refresh(self, sheet_name: str | None = None):
+        self._pool.refresh(sheet_name)
+
+    def is_sheet_error(self, exc: Exception) -> bool:
+        if isinstance(exc, gspread.exceptions.WorksheetNotFound):
+            return True
+        # batchGet answers 400 "Unable to parse range" for a missing worksheet
+        return (
+            isinstance(exc, gspread.exceptions.APIError)
+            and exc.response.status_code == 400
+        )
+
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        values = self._with_worksheet(
+            sheet_name,
+            lambda pool, ws: self._scheduler.read(
+                ws.get_values,
+                key=("values", sheet_name),
+            ),
+        )
+        return values_to_frame(values)
+
+    def batch_get_values(self, ranges: list[str]) -> list:
+        response = self._with_handles(
+            lambda pool: self._scheduler.read(
+                lambda: pool.spreadsheet().values_batch_get(ranges),
+                key=("batch_get", tuple(ranges)),
+            )
+        )
+        return [value_range.get("values", []) for value_range in response["valueRanges"]]
+
+    def read_sheets(self, sheet_names: list[str]) -> dict[str, pd.DataFrame]:
+        # One values.batchGet for every worksheet instead of a request per sheet
+        values = self.batch_get_values(
+            [absolute_range_name(name) for name in sheet_names]
+        )
+        return {
+            name: values_to_frame(sheet_values)
+            for name, sheet_values in zip(sheet_names, values)
+        }
+
+    def header(self, sheet_name: str) -> list:
+        return self._with_handles(lambda pool: pool.header(sheet_name))
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame):
+        values = frame_values(df)
+
+        def _write(pool, ws):
+            # Overwrite in place, then trim the grid to the new shape, so
+            # readers never see the sheet empty half-way through a rewrite
+            self._scheduler.write(lambda: ws.update(values), idempotent=True)
+            self._scheduler.write(
+                lambda: ws.resize(rows=len(values), cols=max(len(values[0]), 1)),
+                idempotent=True,
+            )
+            pool.set_header(sheet_name, df.columns.tolist())
+
+        self._with_worksheet(sheet_name, _write)
+
+    def append_rows(self, sheet_name: str, rows: list[dict], chunk_size: int):
+        def _append(pool, ws):
+            header = pool.header(sheet_name, {col for row in rows for col in row})
+            values = [[to_cell(row.get(col, "")) for col in header] for row in rows]
+
+            # One request per chunk keeps very large batches under the payload limit
+            for start in range(0, len(values), chunk_size):
+                chunk = values[start:start + chunk_size]
+                self._scheduler.write(lambda: ws.append_rows(chunk))
+
+        self._with_worksheet(sheet_name, _append)
+
+    def update_rows(self, sheet_name: str, key_column: str, changes: dict):
+        def _update(pool, ws):
+            header = pool.header(
+                sheet_name,
+                {key_column} | {col for values in changes.values() for col in values},
+            )
+            columns = [str(c).strip().lower() for c in header]
+            if key_column not in columns:
+                raise KeyError(f"{key_column} not found in {sheet_name}")
+
+            # Row positions come from a fresh read of the key column alone, so
+            # rows appended or reordered since the last read land in the right place
+            keys = self._scheduler.read(
+                lambda: ws.col_values(columns.index(key_column) + 1)
+            )[1:]
+            rows_by_key = {}
+            for offset, key in enumerate(keys):
+                rows_by_key.setdefault(str(key), []).append(offset + 2)
+
+            cells = {}
+            for key, new_values in changes.items():
+                row_numbers = rows_by_key.get(str(key))
+                if not row_numbers:
+                    raise KeyError(f"{key_column}={key} not found in {sheet_name}")
+
+                for col, value in new_values.items():
+                    if col not in columns:
+                        raise KeyError(f"{col} not found in {sheet_name}")
+
+                    for row_number in row_numbers:
+                        cells[(row_number, columns.index(col) + 1)] = to_cell(value)
+
+            if not cells:
+                return
+
+            # Adjacent cells of a row go out as one range; all ranges in one request
+            data = []
+            for row_number, col_number in sorted(cells):
+                value = cells[(row_number, col_number)]
+                last = data[-1] if data else None
+                if last and last["row"] == row_number and last["end"] == col_number - 1:
+                    last["values"].append(value)
+                    last["end"] = col_number
+                else:
+                    data.append({
+                        "row": row_number,
+                        "start": col_number,
+                        "end": col_number,
+                        "values": [value],
+                    })
+
+            ranges = [
+                {
+                    "range": (
+                        f"{rowcol_to_a1(d['row'], d['start'])}:"
+                        f"{rowcol_to_a1(d['row'], d['end'])}"
+                    ),
+                    "values": [d["values"]],
+                }
+                for d in data
+            ]
+            self._scheduler.write(lambda: ws.batch_update(ranges), idempotent=True)
+
+        self._with_worksheet(sheet_name, _update)
+
+# ─────────────────────────────────────────────
+# Local SQLite file
+# ─────────────────────────────────────────────
+# One table per sheet, every column TEXT, rowid order = sheet row order.
+# A sheet that does not exist yet reads as empty and is created by the first
+# write or append, so a fresh database works without any setup.
+def _quote(name: str) -> str:
+    return '"{}"'.format(str(name).replace('"', '""'))
+
+class SQLiteBackend(StorageBackend):
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+
+    def _connect(self) -> sqlite3.Connection:
+        con = getattr(self._local, "con", None)
+        if con is None:
+            con = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    @contextmanager
+    def transaction(self):
+        con = self._connect()
+        con.execute("BEGIN IMMEDIATE")
+        try:
+            yield con
+            con.execute("COMMIT")
+        except BaseException:
+            con.execute("ROLLBACK")
+            raise
+
+    def _header(self, con, sheet_name: str) -> list:
+        return [
+            row[1]
+            for row in con.execute(f"PRAGMA table_info({_quote(sheet_name)})")
+        ]
+
+    def _create(self, con, sheet_name: str, header: list):
+        con.execute(
+            f"CREATE TABLE {_quote(sheet_name)} "
+            f"({', '.join(_quote(c) + ' TEXT' for c in header)})"
+        )
+
+    def _insert(self, con, sheet_name: str, width: int, rows: list):
+        con.executemany(
+            f"INSERT INTO {_quote(sheet_name)} "
+            f"VALUES ({', '.join('?' for _ in range(width))})",
+            rows,
+        )
+
+    # Raw cell access: header row first, then data rows, all strings
+    def read_values(self, sheet_name: str) -> list:
+        con = self._connect()
+
+        header = self._header(con, sheet_name)
+        if not header:
+            return []
+
+        rows = con.execute(
+            f"SELECT * FROM {_quote(sheet_name)} ORDER BY rowid"
+        ).fetchall()
+
+        return [header] + [list(row) for row in rows]
+
+    def replace_values(self, sheet_name: str, values: list, con=None):
+        if con is None:
+            with self.transaction() as con:
+                return self.replace_values(sheet_name, values, con)
+
+        con.execute(f"DROP TABLE IF EXISTS {_quote(sheet_name)}")
+        if not values or values == [[]]:
+            return
+
+        values = fill_gaps(values)
+        self._create(con, sheet_name, values[0])
+        self._insert(con, sheet_name, len(values[0]), values[1:])
+
+    def append_values(self, sheet_name: str, rows: list, con=None):
+        if con is None:
+            with self.transaction() as con:
+                return self.append_values(sheet_name, rows, con)
+
+        width = len(self._header(con, sheet_name))
+        rows = [
+            (list(row) + [""] * width)[:width]
+            for row in rows
+        ]
+        self._insert(con, sheet_name, width, rows)
+
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        return values_to_frame(self.read_values(sheet_name))
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame):
+        self.replace_values(sheet_name, frame_values(df))
+
+    def append_rows(self, sheet_name: str, rows: list[dict], chunk_size: int):
+        with self.transaction() as con:
+            header = self._header(con, sheet_name)
+            if not header:
+                header = list(dict.fromkeys(col for row in rows for col in row))
+                self._create(con, sheet_name, header)
+
+            self._insert(
+                con,
+                sheet_name,
+                len(header),
+                [[to_cell(row.get(col, "")) for col in header] for row in rows],
+            )
+
+    def update_rows(self, sheet_name: str, key_column: str, changes: dict):
+        with self.transaction() as con:
+            header = self._header(con, sheet_name)
+            columns = {str(c).strip().lower(): c for c in header}
+            if key_column not in columns:
+                raise KeyError(f"{key_column} not found in {sheet_name}")
+
+            for key, new_values in changes.items():
+                for col in new_values:
+                    if col not in columns:
+                        raise KeyError(f"{col} not found in {sheet_name}")
+
+                if not new_values:
+                    continue
+
+                assignments = ", ".join(
+                    f"{_quote(columns[col])} = ?" for col in new_values
+                )
+                cursor = con.execute(
+                    f"UPDATE {_quote(sheet_name)} SET {assignments} "
+                    f"WHERE {_quote(columns[key_column])} = ?",
+                    [to_cell(v) for v in new_values.values()] + [str(key)],
+                )
+                if cursor.rowcount == 0:
+                    raise KeyError(f"{key_column}={key} not found in {sheet_name}")
+
+# ─────────────────────────────────────────────
+# Backend selection
+# ─────────────────────────────────────────────
+#   [data]
+#   backend = "sqlite"            # default "gsheets"
+#   sqlite_path = "data/itam.sqlite3"
+#   replica = true                # gsheets only: serve reads from a local copy
+@st.cache_resource
+def get_backend() -> StorageBackend:
+    backend = get_setting("data", "backend", "gsheets")
+
+    if backend == "gsheets":
+        scheduler = RequestScheduler(
+            read_per_minute=float(get_setting("sheets_api", "read_per_minute", 60)),
+            write_per_minute=float(get_setting("sheets_api", "write_per_minute", 60)),
+            max_retries=int(get_setting("sheets_api", "max_retries", 5)),
+        )
+        sheets = GoogleSheetsBackend(
+            st.secrets["gcp_service_account"]["spreadsheet_id"],
+            scheduler,
+            header_ttl_seconds=float(get_setting("sheets_api", "header_ttl_seconds", 300)),
+        )
+        if not get_setting("data", "replica", False):
+            return sheets
+
+        from utils.replica import ReplicatedBackend
+
+        return ReplicatedBackend(
+            sheets,
+            SQLiteBackend(get_setting("data", "replica_path", "data/replica.sqlite3")),
+            sync_seconds=float(get_setting("data", "replica_sync_seconds", 60)),
+            full_sync_seconds=float(get_setting("data", "replica_full_sync_seconds", 1800)),
+        )
+
+    if backend == "sqlite":
+        return SQLiteBackend(get_setting("data", "sqlite_path", "data/itam.sqlite3"))
+
+    raise ValueError(f"Unknown data backend: {backend}")
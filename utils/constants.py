@@ -10,6 +10,8 @@ SUBSCRIPTION_ASSIGNMENTS_SHEET = "subscription_assignments"
 SOFTWARE_ASSIGNMENTS_SHEET = "software_assignments"
 SOFTWARE_MASTER_SHEET = "software_master"
 EMPLOYEE_MASTER_SHEET = "employee_master"
+CREDENTIALS_SHEET = "credentials_master"
+CCTV_WIFI_SHEET = "cctv_wifi_credential"
 
 
 # Roles
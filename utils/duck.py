@@ -0,0 +1,110 @@
+# utils/duck.py
+
+import threading
+from collections import OrderedDict
+
+import duckdb
+import pandas as pd
+import streamlit as st
+
+from utils.gsheets import get_sheet_version, pending_writes, read_sheets
+
+# One in-memory DuckDB database per process. Each sheet a query needs is
+# copied into a table named after the sheet and only reloaded when the
+# sheet's data version changes (a snapshot with different content in the
+# shared cache, or queued writes). Query results are memoized per (sql,
+# params, data versions), so a rerun with unchanged data and filters
+# doesn't touch DuckDB at all. This is
+# result caching only: a miss is parsed and planned from scratch, as the
+# Python API has no reusable prepared statement (and EXECUTE can't take
+# bound parameters).
+class DuckEngine:
+    def __init__(self, max_results: int = 64):
+        self.max_results = max_results
+
+        self._con = duckdb.connect(database=":memory:")
+        self._lock = threading.Lock()
+        self._loaded = {}               # sheet -> data version of its table
+        self._results = OrderedDict()   # (sql, params, versions) -> DataFrame
+        self._local = threading.local()
+
+    def _cursor(self):
+        # DuckDB connections aren't thread-safe; cursors on the same
+        # database are, one per thread
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._local.cursor = self._con.cursor()
+        return cursor
+
+    @staticmethod
+    def _version(sheet_name: str):
+        return get_sheet_version(sheet_name), pending_writes(sheet_name)
+
+    def _load(self, sheet_name: str, df: pd.DataFrame, version):
+        if df.empty:
+            # No values to infer types from; keep text columns comparable to text
+            df = df.astype("string")
+
+        with self._lock:
+            self._con.register("_incoming", df)
+            try:
+                self._con.execute(
+                    f'CREATE OR REPLACE TABLE "{sheet_name}" AS SELECT * FROM _incoming'
+                )
+            finally:
+                self._con.unregister("_incoming")
+            self._loaded[sheet_name] = version
+
+    def sync(self, sheet_names: list[str]) -> tuple:
+        versions = {name: self._version(name) for name in sheet_names}
+        stale = [
+            name for name, version in versions.items()
+            if version[0] is None or self._loaded.get(name) != version
+        ]
+
+        if stale:
+            frames = read_sheets(stale)
+            for name in stale:
+                versions[name] = self._version(name)
+                # Reloaded after the TTL with unchanged content: same version
+                if versions[name][0] is None or self._loaded.get(name) != versions[name]:
+                    self._load(name, frames[name], versions[name])
+
+        return tuple(sorted(versions.items()))
+
+    def query(self, sql: str, params: list | None = None, sheets: list[str] = ()) -> pd.DataFrame:
+        versions = self.sync(list(sheets))
+        params = list(params or [])
+        key = (
+            sql,
+            tuple(tuple(p) if isinstance(p, list) else p for p in params),
+            versions,
+        )
+        # Sheets that couldn't be cached have no stable version to key on
+        memoize = all(version[0] is not None for _, version in versions)
+
+        if memoize:
+            with self._lock:
+                if key in self._results:
+                    self._results.move_to_end(key)
+                    return self._results[key].copy()
+
+        df = self._cursor().execute(sql, params).df()
+
+        if memoize:
+            with self._lock:
+                self._results[key] = df
+                while len(self._results) > self.max_results:
+                    self._results.popitem(last=False)
+
+        return df.copy()
+
+@st.cache_resource
+def _get_engine():
+    return DuckEngine()
+
+def query(sql: str, params: list | None = None, sheets: list[str] = ()) -> pd.DataFrame:
+    # Tables are named after the sheets, e.g.
+    #   query("SELECT * FROM assets_master WHERE location = ?", ["HO"],
+    #         sheets=[ASSETS_MASTER_SHEET])
+    return _get_engine().query(sql, params, sheets)
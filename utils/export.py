@@ -1,17 +1,224 @@
 # utils/export.py
 
+import gzip
+import hashlib
+import importlib.util
+import io
+import os
+import shutil
+import tempfile
+import threading
+from collections import OrderedDict
+
+import duckdb
 import streamlit as st
 import pandas as pd
 
-def export_csv(df: pd.DataFrame, filename: str):
+from utils.settings import get_setting
+
+def frame_digest(df: pd.DataFrame) -> str:
+    # Content hash of the values, column names and dtypes. Vectorized, so
+    # much cheaper than serializing the frame.
+    digest = hashlib.sha1()
+    digest.update(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode())
+    try:
+        hashed = pd.util.hash_pandas_object(df, index=False)
+    except TypeError:
+        # Unhashable cells (lists, dicts); hash their text instead
+        hashed = pd.util.hash_pandas_object(df.astype(str), index=False)
+    digest.update(hashed.to_numpy().tobytes())
+    return digest.hexdigest()
+
+# Generated export payloads, shared by all sessions, keyed by content hash
+class _ExportCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> bytes
+        self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            payload = self._entries.get(key)
+            if payload is not None:
+                self._entries.move_to_end(key)
+            return payload
+
+    def put(self, key, payload: bytes):
+        if len(payload) > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old)
+
+            self._entries[key] = payload
+            self._bytes += len(payload)
+            while self._bytes > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= len(evicted)
+
+@st.cache_resource
+def _get_export_cache():
+    return _ExportCache(
+        max_bytes=int(get_setting("export", "cache_max_mb", 64)) * 1024 * 1024,
+    )
+
+# ─────────────────────────────────────────────
+# Formats
+# ─────────────────────────────────────────────
+# Every writer emits into a binary file object (CSV chunk by chunk, so no
+# whole-file string is built on top of the frame). The finished payload is
+# held in memory in full: st.download_button only takes complete data, and
+# the bytes are then kept in the export cache.
+CHUNK_ROWS = 50_000
+XLSX_MAX_ROWS = 1_048_575   # sheet limit, minus the header
+
+def _write_csv(df: pd.DataFrame, out):
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    for start in range(0, len(df), CHUNK_ROWS):
+        df.iloc[start:start + CHUNK_ROWS].to_csv(text, header=start == 0, index=False)
+    text.flush()
+    text.detach()
+
+def _write_csv_gzip(df: pd.DataFrame, out):
+    with gzip.GzipFile(fileobj=out, mode="wb", compresslevel=6) as packed:
+        _write_csv(df, packed)
+
+def _to_duckdb(df: pd.DataFrame):
+    con = duckdb.connect(database=":memory:")
+    # Object columns with mixed values (numbers and text) can't be typed
+    con.register("_export", df.astype({
+        col: "string" for col in df.columns if df[col].dtype == object
+    }))
+    return con
+
+def _write_parquet(df: pd.DataFrame, out):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "export.parquet")
+        con = _to_duckdb(df)
+        try:
+            con.execute(f"COPY _export TO '{path}' (FORMAT PARQUET, COMPRESSION ZSTD)")
+        finally:
+            con.close()
+        with open(path, "rb") as f:
+            shutil.copyfileobj(f, out)
+
+def _write_arrow(df: pd.DataFrame, out):
+    import pyarrow as pa
+
+    con = _to_duckdb(df)
+    try:
+        batches = con.execute("SELECT * FROM _export").fetch_record_batch(CHUNK_ROWS)
+        with pa.ipc.new_file(out, batches.schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    finally:
+        con.close()
+
+def _excel_engine() -> str | None:
+    for engine in ["xlsxwriter", "openpyxl"]:
+        if importlib.util.find_spec(engine) is not None:
+            return engine
+    return None
+
+def _write_xlsx(df: pd.DataFrame, out):
+    if len(df) > XLSX_MAX_ROWS:
+        raise ValueError(f"Excel holds at most {XLSX_MAX_ROWS:,} rows; use CSV or Parquet")
+
+    # One pass: pandas emits cells column by column, which rules out
+    # xlsxwriter's streaming (constant_memory) mode and chunked writes
+    with pd.ExcelWriter(out, engine=_excel_engine()) as writer:
+        df.to_excel(writer, index=False)
+
+# label -> (file extension, mime type, writer)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv", _write_csv),
+    "CSV (gzip)": (".csv.gz", "application/gzip", _write_csv_gzip),
+    "Parquet": (".parquet", "application/vnd.apache.parquet", _write_parquet),
+    "Arrow IPC": (".arrow", "application/vnd.apache.arrow.file", _write_arrow),
+    "Excel": (
+        ".xlsx",
+        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        _write_xlsx,
+    ),
+}
+
+def available_formats() -> list[str]:
+    # Arrow and Excel need optional packages
+    formats = ["CSV", "CSV (gzip)", "Parquet"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats.append("Arrow IPC")
+    if _excel_engine() is not None:
+        formats.append("Excel")
+    return formats
+
+def _payload(df: pd.DataFrame, digest: str, fmt: str) -> bytes:
+    cache = _get_export_cache()
+    payload = cache.get((digest, fmt))
+    if payload is None:
+        out = io.BytesIO()
+        EXPORT_FORMATS[fmt][2](df, out)
+        # Hands back the buffer's own bytes, no extra copy
+        payload = out.getvalue()
+        cache.put((digest, fmt), payload)
+    return payload
+
+def export_data(
+    df: pd.DataFrame,
+    filename: str,
+    label: str = "⬇️ Download",
+    key: str | None = None,
+    formats: list[str] | None = None,
+):
+    # Nothing is serialized until the user asks for the file. Once prepared,
+    # the download stays offered for as long as the frame's content and the
+    # format are the same; a filter change goes back to the prepare button.
     if df.empty:
         st.warning("No data to export")
         return
 
-    csv = df.to_csv(index=False)
-    st.download_button(
-        label="⬇️ Download CSV",
-        data=csv,
-        file_name=filename,
-        mime="text/csv"
+    key = key or f"export_{filename}"
+    formats = [f for f in (formats or available_formats()) if f in EXPORT_FORMATS]
+    stem = os.path.splitext(filename)[0]
+
+    fmt = formats[0]
+    if len(formats) > 1:
+        fmt = st.selectbox("Format", formats, key=f"{key}_format")
+        label = f"{label} {fmt}"
+    extension, mime, _ = EXPORT_FORMATS[fmt]
+
+    prepared = st.session_state.get(f"_{key}_prepared")
+    digest = frame_digest(df) if prepared is not None else None
+
+    # The download button takes the prepare button's place once clicked
+    slot = st.empty()
+    if prepared != (digest, fmt):
+        if not slot.button(f"📦 Prepare {stem}{extension}", key=f"{key}_prepare"):
+            return
+        digest = digest or frame_digest(df)
+        st.session_state[f"_{key}_prepared"] = (digest, fmt)
+
+    try:
+        payload = _payload(df, digest, fmt)
+    except ValueError as e:
+        slot.error(str(e))
+        return
+
+    slot.download_button(
+        label=label,
+        data=payload,
+        file_name=f"{stem}{extension}",
+        mime=mime,
+        key=f"{key}_download",
     )
+
+def export_csv(
+    df: pd.DataFrame,
+    filename: str,
+    label: str = "⬇️ Download CSV",
+    key: str | None = None,
+):
+    export_data(df, filename, label=label, key=key, formats=["CSV"])
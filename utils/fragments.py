@@ -0,0 +1,14 @@
+# utils/fragments.py
+
+import streamlit as st
+
+# A fragment reruns on its own when one of its widgets changes, instead of
+# the whole page. Streamlit 1.37+ calls it st.fragment, 1.33-1.36
+# st.experimental_fragment; older versions have neither and the decorated
+# section simply runs as part of the page.
+_fragment = getattr(st, "fragment", None) or getattr(st, "experimental_fragment", None)
+
+FRAGMENTS_SUPPORTED = _fragment is not None
+
+def fragment(func):
+    return _fragment(func) if FRAGMENTS_SUPPORTED else func
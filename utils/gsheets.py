@@ -1,52 +1,360 @@
 # utils/gsheets.py
 
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import pandas as pd
-import gspread
-from google.oauth2.service_account import Credentials
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from utils.backends import frame_values, get_backend, to_cell
+from utils.export import frame_digest
+from utils.journal import WriteBehind, WriteJournal, apply_pending
+from utils.schemas import apply_schema
+from utils.settings import get_setting
+
+# ─────────────────────────────────────────────
+# Shared sheet cache (all sessions, one process)
+# ─────────────────────────────────────────────
+class _SheetCache:
+    def __init__(self, ttl_seconds: float, max_bytes: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # sheet -> (df, loaded_at, nbytes, version)
+        self._write_seq = {}            # sheet -> number of writes seen
+        self._digests = {}              # sheet -> (content digest, version), kept past eviction
+        self._next_version = 1
+        self._bytes = 0
+
+    def get(self, sheet_name: str):
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            if entry is None:
+                return None
+
+            df, loaded_at, _, version = entry
+            if time.monotonic() - loaded_at > self.ttl_seconds:
+                self._drop(sheet_name)
+                return None
+
+            self._entries.move_to_end(sheet_name)
+            return df, version
+
+    def write_seq(self, sheet_name: str) -> int:
+        with self._lock:
+            return self._write_seq.get(sheet_name, 0)
+
+    def put(self, sheet_name: str, df: pd.DataFrame, write_seq: int):
+        nbytes = int(df.memory_usage(deep=True).sum())
+        digest = frame_digest(df)
+
+        with self._lock:
+            # A write landed while this snapshot was being fetched
+            if self._write_seq.get(sheet_name, 0) != write_seq:
+                return None
+
+            self._drop(sheet_name)
+
+            # A reload after the TTL usually finds the same content; keeping
+            # its version spares everything keyed on it (DuckDB tables, query
+            # results, search indexes) a rebuild
+            previous = self._digests.get(sheet_name)
+            if previous is not None and previous[0] == digest:
+                version = previous[1]
+            else:
+                version = self._next_version
+                self._next_version += 1
+                self._digests[sheet_name] = (digest, version)
+
+            if nbytes > self.max_bytes:
+                return version
+
+            self._entries[sheet_name] = (df, time.monotonic(), nbytes, version)
+            self._bytes += nbytes
+
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+
+            return version
+
+    def invalidate(self, sheet_name: str | None = None):
+        with self._lock:
+            names = (
+                [sheet_name] if sheet_name
+                else set(self._entries) | set(self._write_seq)
+            )
+            for name in names:
+                self._write_seq[name] = self._write_seq.get(name, 0) + 1
+                self._drop(name)
+
+    def version(self, sheet_name: str):
+        with self._lock:
+            entry = self._entries.get(sheet_name)
+            return entry[3] if entry else None
+
+    def _drop(self, sheet_name: str):
+        entry = self._entries.pop(sheet_name, None)
+        if entry is not None:
+            self._bytes -= entry[2]
+
+@st.cache_resource
+def _get_sheet_cache():
+    return _SheetCache(
+        ttl_seconds=float(get_setting("data", "cache_ttl_seconds", 60)),
+        max_bytes=int(get_setting("data", "cache_max_mb", 256)) * 1024 * 1024,
+    )
+
+def invalidate_sheet(sheet_name: str | None = None):
+    _get_sheet_cache().invalidate(sheet_name)
+
+def get_sheet_version(sheet_name: str):
+    # Changes when a snapshot with different content is loaded into the cache;
+    # None while the sheet isn't cached
+    return _get_sheet_cache().version(sheet_name)
+
+# ─────────────────────────────────────────────
+# Concurrent fetching
+# ─────────────────────────────────────────────
+class SheetReadError(Exception):
+    def __init__(self, errors: dict, frames: dict):
+        super().__init__(
+            "Could not read "
+            + ", ".join(f"{name} ({error})" for name, error in errors.items())
+        )
+        self.errors = errors    # sheet -> exception
+        self.frames = frames    # sheet -> DataFrame for the sheets that did load
+
+@st.cache_resource
+def _get_fetch_pool():
+    return ThreadPoolExecutor(
+        max_workers=int(get_setting("data", "fetch_workers", 4)),
+        thread_name_prefix="sheet-fetch",
+    )
+
+def _fetch_each(backend, sheet_names: list[str]):
+    ctx = get_script_run_ctx()
+
+    def _fetch(name):
+        add_script_run_ctx(threading.current_thread(), ctx)
+        return backend.read_sheet(name)
+
+    pool = _get_fetch_pool()
+    futures = {name: pool.submit(_fetch, name) for name in sheet_names}
+
+    frames, errors = {}, {}
+    for name, future in futures.items():
+        try:
+            frames[name] = future.result()
+        except Exception as e:
+            errors[name] = e
 
-SCOPES = [
-    "https://www.googleapis.com/auth/spreadsheets",
-    "https://www.googleapis.com/auth/drive"
-]
+    return frames, errors
 
+def _fetch_sheets(sheet_names: list[str]):
+    backend = get_backend()
+
+    if len(sheet_names) == 1:
+        return {sheet_names[0]: backend.read_sheet(sheet_names[0])}, {}
+
+    if backend.batch_reads:
+        try:
+            return backend.read_sheets(sheet_names), {}
+        except Exception as e:
+            # One bad sheet fails the whole batch; retry per sheet to isolate
+            # it. Quota and server errors (already retried with backoff by the
+            # scheduler) would only fail again, once per sheet
+            if not backend.is_sheet_error(e):
+                return {}, {name: e for name in sheet_names}
+
+    # Independent sheets in parallel: latency of the slowest, not the sum
+    return _fetch_each(backend, sheet_names)
+
+# ─────────────────────────────────────────────
+# Write-behind (optional, see utils.journal)
+# ─────────────────────────────────────────────
 @st.cache_resource
-def _get_client():
-    creds = Credentials.from_service_account_info(
-        st.secrets["gcp_service_account"],
-        scopes=SCOPES
+def _get_write_behind():
+    if not get_setting("data", "write_behind", False):
+        return None
+
+    # The worker thread has no script context: hand it the cache instance
+    # itself rather than letting it call back into st.cache_resource
+    cache = _get_sheet_cache()
+    return WriteBehind(
+        WriteJournal(get_setting("data", "journal_path", "data/write_journal.jsonl")),
+        get_backend(),
+        on_applied=cache.invalidate,
+        chunk_size=int(get_setting("data", "append_chunk_rows", 1000)),
+        flush_seconds=float(get_setting("data", "write_behind_flush_seconds", 2)),
     )
-    return gspread.authorize(creds)
+
+def _journal(op: str, sheet_name: str, **payload) -> bool:
+    # True when the mutation was queued instead of sent
+    writer = _get_write_behind()
+    if writer is None:
+        return False
+
+    writer.journal.record(op, sheet_name, **payload)
+    writer.notify()
+    return True
+
+def _with_pending(frames: dict) -> dict:
+    # Show queued writes on top of what the backend returned
+    writer = _get_write_behind()
+    if writer is None:
+        return frames
+
+    for name, df in frames.items():
+        entries = writer.journal.pending(name)
+        if entries:
+            frames[name] = apply_schema(name, apply_pending(df, entries))
+    return frames
+
+def pending_writes(sheet_name: str | None = None) -> int:
+    writer = _get_write_behind()
+    return len(writer.journal.pending(sheet_name)) if writer else 0
+
+# ─────────────────────────────────────────────
+# Sheet I/O (storage backend chosen in utils.backends)
+# ─────────────────────────────────────────────
+def refresh_sheet_handles(sheet_name: str | None = None):
+    # Call after adding / renaming worksheets or editing a header row by hand
+    get_backend().refresh(sheet_name)
+
+def get_last_sync(sheet_name: str):
+    # When the local replica last pulled this sheet from Google (None without one)
+    return get_backend().last_synced(sheet_name)
 
 def read_sheet(sheet_name: str) -> pd.DataFrame:
-    client = _get_client()
-    sh = client.open_by_key(st.secrets["gcp_service_account"]["spreadsheet_id"])
-    ws = sh.worksheet(sheet_name)
+    cache = _get_sheet_cache()
 
-    records = ws.get_all_records()
-    df = pd.DataFrame(records)
+    cached = cache.get(sheet_name)
+    if cached is None:
+        write_seq = cache.write_seq(sheet_name)
+        df = apply_schema(sheet_name, get_backend().read_sheet(sheet_name))
+        cache.put(sheet_name, df, write_seq)
+    else:
+        df = cached[0]
 
-    if df.empty:
-        return df
+    # Callers mutate what they get back; the cached snapshot must stay intact
+    return _with_pending({sheet_name: df.copy()})[sheet_name]
 
-    df.columns = df.columns.str.strip().str.lower()
-    return df
+def read_sheets(sheet_names: list[str]) -> dict[str, pd.DataFrame]:
+    cache = _get_sheet_cache()
 
-def write_sheet(sheet_name: str, df: pd.DataFrame):
-    client = _get_client()
-    sh = client.open_by_key(st.secrets["gcp_service_account"]["spreadsheet_id"])
-    ws = sh.worksheet(sheet_name)
+    frames = {}
+    missing = []
+    for name in dict.fromkeys(sheet_names):
+        cached = cache.get(name)
+        if cached is None:
+            missing.append(name)
+        else:
+            frames[name] = cached[0]
+
+    errors = {}
+    if missing:
+        write_seqs = {name: cache.write_seq(name) for name in missing}
+        fetched, errors = _fetch_sheets(missing)
+        for name, df in fetched.items():
+            df = apply_schema(name, df)
+            cache.put(name, df, write_seqs[name])
+            frames[name] = df
+
+    if errors:
+        raise SheetReadError(
+            errors,
+            {name: df.copy() for name, df in frames.items()},
+        ) from next(iter(errors.values()))
 
+    return _with_pending({name: frames[name].copy() for name in sheet_names})
+
+def write_sheet(sheet_name: str, df: pd.DataFrame):
     df = df.copy()
     df.columns = df.columns.str.strip().str.lower()
 
-    ws.clear()
-    ws.update([df.columns.tolist()] + df.astype(str).values.tolist())
+    values = frame_values(df)
+    if _journal("write", sheet_name, columns=values[0], values=values[1:]):
+        return
+
+    try:
+        get_backend().write_sheet(sheet_name, df)
+    finally:
+        invalidate_sheet(sheet_name)
+
+def append_rows(sheet_name: str, rows: list[dict], chunk_size: int | None = None):
+    if not rows:
+        return
+
+    chunk_size = chunk_size or int(get_setting("data", "append_chunk_rows", 1000))
+
+    if _journal(
+        "append", sheet_name,
+        rows=[{col: to_cell(v) for col, v in row.items()} for row in rows],
+    ):
+        return
+
+    try:
+        get_backend().append_rows(sheet_name, rows, chunk_size)
+    finally:
+        invalidate_sheet(sheet_name)
 
 def append_row(sheet_name: str, row: dict):
-    client = _get_client()
-    sh = client.open_by_key(st.secrets["gcp_service_account"]["spreadsheet_id"])
-    ws = sh.worksheet(sheet_name)
+    append_rows(sheet_name, [row])
+
+def _changed_cells(sheet_name: str, key_column: str, changes: dict) -> dict:
+    # Drop cells that already hold the new value in the last-read snapshot
+    cached = _get_sheet_cache().get(sheet_name)
+    if cached is None or key_column not in cached[0].columns:
+        return changes
+
+    df = _with_pending({sheet_name: cached[0]})[sheet_name]
+    snapshot = (
+        df.assign(_key=df[key_column].astype(str))
+        .drop_duplicates("_key")
+        .set_index("_key")
+    )
+
+    reduced = {}
+    for key, new_values in changes.items():
+        if str(key) not in snapshot.index:
+            reduced[key] = new_values
+            continue
+
+        row = snapshot.loc[str(key)]
+        reduced[key] = {
+            col: value
+            for col, value in new_values.items()
+            if col not in snapshot.columns or to_cell(row[col]) != to_cell(value)
+        }
+
+    return reduced
+
+def update_rows(sheet_name: str, key_column: str, changes: dict):
+    # changes: {key value: {column: new value}}, e.g.
+    #   update_rows("asset_assignments", "assignment_id",
+    #               {"ASN-0042": {"assignment_status": "Returned"}})
+    if not changes:
+        return
+
+    changes = _changed_cells(sheet_name, key_column, changes)
+    if not any(changes.values()):
+        return
+
+    if _journal(
+        "update", sheet_name,
+        key_column=key_column,
+        changes={
+            str(key): {col: to_cell(v) for col, v in values.items()}
+            for key, values in changes.items() if values
+        },
+    ):
+        return
 
-    ordered_row = [str(row.get(col, "")) for col in ws.row_values(1)]
-    ws.append_row(ordered_row)
+    try:
+        get_backend().update_rows(sheet_name, key_column, changes)
+    finally:
+        invalidate_sheet(sheet_name)
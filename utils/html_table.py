@@ -1,97 +1,187 @@
+import html
+import math
+import threading
+from collections import OrderedDict
+
+import numpy as np
 import streamlit as st
 import pandas as pd
 
-def render_html_table(
+from utils.export import frame_digest
+
+TABLE_CSS = """
+<style>
+    .table-wrapper {
+        width: 100%;
+        overflow-x: auto;
+    }
+
+    table.custom-table {
+        width: 100%;
+        border-collapse: collapse;
+        font-size: 14px;
+        min-width: 700px;
+    }
+
+    table.custom-table th,
+    table.custom-table td {
+        border: 1px solid #ddd;
+        padding: 8px;
+        white-space: nowrap;
+    }
+
+    table.custom-table th {
+        background-color: #f4f6f8;
+        font-weight: 600;
+        text-align: left;
+    }
+
+    table.custom-table tr:nth-child(even) {
+        background-color: #fafafa;
+    }
+
+    a.open-btn {
+        padding: 4px 10px;
+        background-color: #0f62fe;
+        color: white;
+        text-decoration: none;
+        border-radius: 4px;
+        font-size: 13px;
+    }
+
+    a.open-btn:hover {
+        background-color: #0043ce;
+    }
+</style>
+"""
+
+# Links other than these schemes (javascript:, data:, ...) are not rendered
+SAFE_LINK_SCHEMES = ("http://", "https://", "mailto:")
+
+def _escaped(values: pd.Series) -> np.ndarray:
+    # Escape each distinct value once and broadcast back; missing -> ""
+    codes, uniques = pd.factorize(values)
+    escaped = np.array(
+        [html.escape(str(value)) for value in uniques] + [""],
+        dtype=object,
+    )
+    return escaped[codes]
+
+def _link_cells(values: pd.Series, label: str) -> np.ndarray:
+    codes, uniques = pd.factorize(values)
+    cells = []
+    for value in uniques:
+        link = str(value).strip()
+        if link.lower().startswith(SAFE_LINK_SCHEMES):
+            cells.append(
+                f'<td><a class="open-btn" href="{html.escape(link, quote=True)}" '
+                f'target="_blank">{html.escape(label)}</a></td>'
+            )
+        else:
+            cells.append("<td>-</td>")
+    cells.append("<td>-</td>")
+    return np.array(cells, dtype=object)[codes]
+
+def table_html(
     df: pd.DataFrame,
     columns: list,
     link_column: str | None = None,
     link_label: str = "Open",
-):
-    if df.empty:
-        st.info("No data available.")
-        return
-
-    # Ensure columns exist
+) -> str:
+    # Markup for the whole frame, built a column at a time: every cell is
+    # escaped, rows are concatenated as arrays and joined once.
     columns = [c for c in columns if c in df.columns]
 
-    html = """
-    <style>
-        .table-wrapper {
-            width: 100%;
-            overflow-x: auto;
-        }
-
-        table.custom-table {
-            width: 100%;
-            border-collapse: collapse;
-            font-size: 14px;
-            min-width: 700px;
-        }
-
-        table.custom-table th,
-        table.custom-table td {
-            border: 1px solid #ddd;
-            padding: 8px;
-            white-space: nowrap;
-        }
-
-        table.custom-table th {
-            background-color: #f4f6f8;
-            font-weight: 600;
-            text-align: left;
-        }
-
-        table.custom-table tr:nth-child(even) {
-            background-color: #fafafa;
-        }
-
-        a.open-btn {
-            padding: 4px 10px;
-            background-color: #0f62fe;
-            color: white;
-            text-decoration: none;
-            border-radius: 4px;
-            font-size: 13px;
-        }
-
-        a.open-btn:hover {
-            background-color: #0043ce;
-        }
-    </style>
-
-    <div class="table-wrapper">
-    <table class="custom-table">
-        <thead>
-            <tr>
-    """
+    header = "".join(
+        f"<th>{html.escape(str(col).replace('_', ' ').title())}</th>" for col in columns
+    )
+    if link_column:
+        header += "<th>Action</th>"
 
+    rows = np.full(len(df), "<tr>", dtype=object)
     for col in columns:
-        html += f"<th>{col.replace('_', ' ').title()}</th>"
-
+        rows = rows + "<td>" + _escaped(df[col]) + "</td>"
     if link_column:
-        html += "<th>Action</th>"
-
-    html += "</tr></thead><tbody>"
-
-    for _, row in df.iterrows():
-        html += "<tr>"
-
-        for col in columns:
-            val = "" if pd.isna(row[col]) else row[col]
-            html += f"<td>{val}</td>"
+        links = df[link_column] if link_column in df.columns else pd.Series(None, index=df.index)
+        rows = rows + _link_cells(links, link_label)
+    rows = rows + "</tr>"
+
+    return (
+        '<div class="table-wrapper"><table class="custom-table">'
+        f"<thead><tr>{header}</tr></thead><tbody>"
+        + "".join(rows)
+        + "</tbody></table></div>"
+    )
+
+# ─────────────────────────────────────────────
+# Rendered pages, keyed by data version
+# ─────────────────────────────────────────────
+_MAX_PAGES = 64
+_pages = OrderedDict()
+_pages_lock = threading.Lock()
+
+def _cached_page(cache_key, build) -> str:
+    with _pages_lock:
+        markup = _pages.get(cache_key)
+        if markup is not None:
+            _pages.move_to_end(cache_key)
+            return markup
+
+    markup = build()
+    with _pages_lock:
+        _pages[cache_key] = markup
+        while len(_pages) > _MAX_PAGES:
+            _pages.popitem(last=False)
+    return markup
 
-        if link_column:
-            link = row.get(link_column)
-            if pd.notna(link) and str(link).strip():
-                html += (
-                    f'<td><a class="open-btn" href="{link}" '
-                    f'target="_blank">{link_label}</a></td>'
-                )
-            else:
-                html += "<td>-</td>"
-
-        html += "</tr>"
-
-    html += "</tbody></table></div>"
+def render_html_table(
+    df: pd.DataFrame,
+    columns: list,
+    link_column: str | None = None,
+    link_label: str = "Open",
+    page_size: int = 100,
+    key: str = "html_table",
+    version=None,
+):
+    # Only the current page is rendered. Pages are cached per data version;
+    # pass one that identifies exactly this frame (e.g. sheet version plus
+    # filters) to skip hashing the frame on reruns.
+    if df.empty:
+        st.info("No data available.")
+        return
 
-    st.markdown(html, unsafe_allow_html=True)
+    pages = max(1, math.ceil(len(df) / page_size))
+    page = 1
+    if pages > 1:
+        if st.session_state.get(f"{key}_page", 1) > pages:
+            st.session_state[f"{key}_page"] = pages
+        page = st.number_input(
+            f"Page (of {pages})",
+            min_value=1,
+            max_value=pages,
+            step=1,
+            key=f"{key}_page",
+        )
+
+    start = (page - 1) * page_size
+    cache_key = (
+        key,
+        version if version is not None else frame_digest(df),
+        tuple(columns),
+        link_column,
+        link_label,
+        start,
+        page_size,
+    )
+    markup = _cached_page(
+        cache_key,
+        lambda: table_html(
+            df.iloc[start:start + page_size], columns, link_column, link_label
+        ),
+    )
+
+    st.markdown(TABLE_CSS + markup, unsafe_allow_html=True)
+    if pages > 1:
+        st.caption(
+            f"Rows {start + 1}–{min(start + page_size, len(df))} of {len(df)}"
+        )
@@ -0,0 +1,105 @@
+# utils/ids.py
+
+import threading
+
+import streamlit as st
+
+from utils.constants import (
+    ASSETS_MASTER_SHEET,
+    ASSET_ASSIGNMENTS_SHEET,
+    SOFTWARE_ASSIGNMENTS_SHEET,
+    SOFTWARE_MASTER_SHEET,
+    CREDENTIALS_SHEET,
+)
+from utils.gsheets import get_sheet_version, pending_writes, read_sheet
+
+# prefix -> (sheet, id column, zero-padded width)
+ID_FORMATS = {
+    "AST": (ASSETS_MASTER_SHEET, "asset_id", 3),
+    "ASN": (ASSET_ASSIGNMENTS_SHEET, "assignment_id", 4),
+    "SASN": (SOFTWARE_ASSIGNMENTS_SHEET, "assignment_id", 3),
+    "SOFT": (SOFTWARE_MASTER_SHEET, "soft_id", 3),
+    "CRED": (CREDENTIALS_SHEET, "credential_id", 3),
+}
+
+# Hands out IDs from an in-memory high-water mark per prefix, bumped under a
+# lock so two admins submitting at the same moment always get different IDs.
+# The mark is also checked against the highest ID in the sheet, scanned once
+# per data version (new snapshot in the shared cache or queued writes), so
+# rows added by hand or by another process are picked up as soon as the
+# cache refreshes, without scanning the sheet on every reservation. Reserved IDs whose
+# write then fails are simply skipped. Two processes allocating within one
+# cache TTL of each other can still collide: run a single app process.
+class IdAllocator:
+    def __init__(self, formats: dict):
+        self.formats = formats
+
+        self._lock = threading.Lock()
+        self._high = {}     # prefix -> highest number handed out or seen
+        self._scanned = {}  # prefix -> (data version, highest number in it)
+
+    def _scan(self, prefix: str) -> int:
+        sheet_name, column, _ = self.formats[prefix]
+        df = read_sheet(sheet_name)
+        if df.empty or column not in df.columns:
+            return 0
+
+        nums = (
+            df[column].astype(str).str.strip()
+            .str.extract(rf"^{prefix}-(\d+)$")[0]
+            .dropna()
+            .astype(int)
+        )
+        return int(nums.max()) if not nums.empty else 0
+
+    def _seen(self, prefix: str) -> int:
+        sheet_name = self.formats[prefix][0]
+
+        version = get_sheet_version(sheet_name), pending_writes(sheet_name)
+        with self._lock:
+            scanned = self._scanned.get(prefix)
+        if version[0] is not None and scanned and scanned[0] == version:
+            return scanned[1]
+
+        seen = self._scan(prefix)
+        # The scan itself may have loaded the snapshot
+        version = get_sheet_version(sheet_name), pending_writes(sheet_name)
+        with self._lock:
+            self._scanned[prefix] = (version, seen)
+        return seen
+
+    def reserve(self, prefix: str, count: int = 1) -> list[str]:
+        _, _, width = self.formats[prefix]
+
+        # Outside the lock: a cache miss reads the sheet
+        seen = self._seen(prefix)
+
+        with self._lock:
+            self._high[prefix] = max(self._high.get(prefix, 0), seen)
+
+            start = self._high[prefix] + 1
+            self._high[prefix] += count
+
+        return [f"{prefix}-{str(n).zfill(width)}" for n in range(start, start + count)]
+
+    def reset(self, prefix: str | None = None):
+        with self._lock:
+            if prefix:
+                self._high.pop(prefix, None)
+                self._scanned.pop(prefix, None)
+            else:
+                self._high.clear()
+                self._scanned.clear()
+
+@st.cache_resource
+def _get_allocator():
+    return IdAllocator(ID_FORMATS)
+
+def next_ids(prefix: str, count: int) -> list[str]:
+    return _get_allocator().reserve(prefix, count)
+
+def next_id(prefix: str) -> str:
+    return next_ids(prefix, 1)[0]
+
+def reset_ids(prefix: str | None = None):
+    _get_allocator().reset(prefix)
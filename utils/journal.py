@@ -0,0 +1,290 @@
+# utils/journal.py
+
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+from gspread.utils import numericise_all
+
+from utils.backends import StorageBackend, to_cell
+
+logger = logging.getLogger(__name__)
+
+# Write-behind for sheet mutations.
+#
+# Every mutation is first appended to a local JSON-lines journal and fsynced;
+# the caller returns as soon as that is done. A background worker replays the
+# journal against the storage backend in order, merging consecutive appends to
+# the same sheet into one batched request.
+#
+# The journal is append-only. Besides the mutations themselves it records
+#   {"begin": [seq, ...]}   before a batch is sent
+#   {"ack": [seq, ...]}     once the backend accepted it
+# so after a crash every un-acked entry is replayed exactly once: updates and
+# rewrites are idempotent, and appends that were begun are first checked
+# against the sheet so rows that already made it are not added twice.
+
+def _row_key(values) -> tuple:
+    # Compare rows the way the sheet stores them: TRUE == True, 7 == "7"
+    cells = numericise_all([to_cell(v) for v in values])
+    return tuple(to_cell(v).lower() for v in cells)
+
+class WriteJournal:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.RLock()
+
+        self._entries = {}      # seq -> entry, un-acked only
+        self._begun = set()
+        self._next_seq = 1
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._recover()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def _recover(self):
+        if not os.path.exists(self.path):
+            return
+
+        with open(self.path, "rb+") as f:
+            data = f.read()
+            # Drop a torn last line from a crash mid-write so new records
+            # don't get glued onto it
+            end = data.rfind(b"\n") + 1
+            if end < len(data):
+                f.truncate(end)
+
+        for line in data[:end].decode("utf-8").splitlines():
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+
+            if "seq" in record:
+                self._entries[record["seq"]] = record
+                self._next_seq = max(self._next_seq, record["seq"] + 1)
+            elif "begin" in record:
+                self._begun.update(record["begin"])
+            elif "ack" in record:
+                for seq in record["ack"]:
+                    self._entries.pop(seq, None)
+                    self._begun.discard(seq)
+
+    def _write(self, record: dict):
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def record(self, op: str, sheet_name: str, **payload) -> int:
+        with self.lock:
+            entry = {"seq": self._next_seq, "op": op, "sheet": sheet_name, **payload}
+            self._write(entry)
+            self._entries[entry["seq"]] = entry
+            self._next_seq += 1
+            return entry["seq"]
+
+    def begin(self, seqs: list[int]):
+        with self.lock:
+            self._write({"begin": seqs})
+            self._begun.update(seqs)
+
+    def ack(self, seqs: list[int], error: str | None = None):
+        with self.lock:
+            self._write({"ack": seqs, **({"error": error} if error else {})})
+            for seq in seqs:
+                self._entries.pop(seq, None)
+                self._begun.discard(seq)
+
+            # Everything delivered: start a fresh file instead of growing forever
+            if not self._entries:
+                self._file.close()
+                self._file = open(self.path, "w", encoding="utf-8")
+
+    def was_begun(self, seq: int) -> bool:
+        with self.lock:
+            return seq in self._begun
+
+    def pending(self, sheet_name: str | None = None) -> list[dict]:
+        with self.lock:
+            return [
+                self._entries[seq]
+                for seq in sorted(self._entries)
+                if sheet_name is None or self._entries[seq]["sheet"] == sheet_name
+            ]
+
+# ─────────────────────────────────────────────
+# Read-your-writes overlay
+# ─────────────────────────────────────────────
+def _append_frame(df: pd.DataFrame, rows: list[dict]) -> pd.DataFrame:
+    new = pd.DataFrame(rows)
+    new.columns = new.columns.str.strip().str.lower()
+
+    if not df.empty:
+        # Rows the backend already has (sent, not yet acked) are not shown twice
+        columns = [c for c in df.columns if c in new.columns]
+        existing = {_row_key(row) for row in df[columns].itertuples(index=False)}
+        new = new[[
+            _row_key(row) not in existing
+            for row in new[columns].itertuples(index=False)
+        ]]
+
+    new = new.apply(lambda col: pd.Series(numericise_all(col.tolist()), index=col.index))
+    return pd.concat([df, new], ignore_index=True)
+
+def apply_pending(df: pd.DataFrame, entries: list[dict]) -> pd.DataFrame:
+    for entry in entries:
+        if entry["op"] == "write":
+            df = pd.DataFrame(entry["values"], columns=entry["columns"])
+            df = df.apply(lambda col: pd.Series(numericise_all(col.tolist()), index=col.index))
+
+        elif entry["op"] == "append":
+            df = _append_frame(df, entry["rows"])
+
+        elif entry["op"] == "update" and entry["key_column"] in df.columns:
+            df = df.copy()
+            keys = df[entry["key_column"]].astype(str)
+            for key, new_values in entry["changes"].items():
+                for col, value in new_values.items():
+                    if col not in df.columns:
+                        continue
+                    # Typed columns are re-coerced by the caller afterwards
+                    if df[col].dtype != object:
+                        df[col] = df[col].astype(object)
+                    df.loc[keys == key, col] = numericise_all([value])[0]
+
+    return df
+
+# ─────────────────────────────────────────────
+# Background flusher
+# ─────────────────────────────────────────────
+class WriteBehind:
+    def __init__(
+        self,
+        journal: WriteJournal,
+        backend: StorageBackend,
+        on_applied,
+        chunk_size: int,
+        flush_seconds: float = 2.0,
+        max_attempts: int = 10,
+    ):
+        self.journal = journal
+        self.backend = backend
+        self.on_applied = on_applied    # called with the sheet name once it was written
+        self.chunk_size = chunk_size
+        self.flush_seconds = flush_seconds
+        self.max_attempts = max_attempts
+
+        self._attempts = {}
+        self._wake = threading.Event()
+        self._flush_lock = threading.Lock()
+
+        threading.Thread(target=self._run, name="write-behind", daemon=True).start()
+
+    def notify(self):
+        self._wake.set()
+
+    def _run(self):
+        delay = self.flush_seconds
+        while True:
+            self._wake.wait(timeout=delay)
+            self._wake.clear()
+
+            try:
+                delay = self.flush_seconds if self.flush() else min(delay * 2, 60)
+            except Exception:
+                logger.exception("Write-behind flush failed")
+                delay = min(delay * 2, 60)
+
+            # Give a burst of submits a moment to coalesce into one batch
+            time.sleep(0.2)
+
+    def _groups(self) -> list[list[dict]]:
+        # Per sheet, in journal order; consecutive appends merge into one group
+        groups = []
+        last_by_sheet = {}
+        for entry in self.journal.pending():
+            last = last_by_sheet.get(entry["sheet"])
+            if last and entry["op"] == "append" and last[-1]["op"] == "append":
+                last.append(entry)
+            else:
+                last_by_sheet[entry["sheet"]] = [entry]
+                groups.append(last_by_sheet[entry["sheet"]])
+        return groups
+
+    def _apply(self, group: list[dict]):
+        first = group[0]
+        sheet_name = first["sheet"]
+
+        if first["op"] == "append":
+            rows = [row for entry in group for row in entry["rows"]]
+
+            if any(self.journal.was_begun(entry["seq"]) for entry in group):
+                # A previous attempt may have partly landed; skip rows already
+                # there. Checked against Google itself: a crash between its
+                # append and the replica's write-through leaves them only there
+                current = self.backend.authoritative().read_sheet(sheet_name)
+                if not current.empty:
+                    existing = {
+                        _row_key(row)
+                        for row in current.itertuples(index=False)
+                    }
+                    rows = [
+                        row for row in rows
+                        if _row_key(row.get(col, "") for col in current.columns) not in existing
+                    ]
+
+            if rows:
+                self.backend.append_rows(sheet_name, rows, self.chunk_size)
+
+        elif first["op"] == "update":
+            self.backend.update_rows(sheet_name, first["key_column"], first["changes"])
+
+        elif first["op"] == "write":
+            self.backend.write_sheet(
+                sheet_name,
+                pd.DataFrame(first["values"], columns=first["columns"]),
+            )
+
+    def flush(self) -> bool:
+        ok = True
+        with self._flush_lock:
+            blocked = set()
+            for group in self._groups():
+                sheet_name = group[0]["sheet"]
+                if sheet_name in blocked:
+                    continue
+
+                seqs = [entry["seq"] for entry in group]
+                self.journal.begin(seqs)
+
+                try:
+                    self._apply(group)
+                except (KeyError, ValueError) as e:
+                    # Will never succeed (row or column gone): record and drop it
+                    attempts = self._attempts.get(seqs[0], 0) + 1
+                    self._attempts[seqs[0]] = attempts
+                    if attempts < self.max_attempts:
+                        blocked.add(sheet_name)
+                        ok = False
+                        continue
+                    logger.error("Dropping journaled write %s: %s", seqs, e)
+                    self.on_applied(sheet_name)
+                    self.journal.ack(seqs, error=str(e))
+                    continue
+                except Exception:
+                    # Network / quota trouble: keep order, retry this sheet later
+                    logger.exception("Write-behind failed for %s", sheet_name)
+                    blocked.add(sheet_name)
+                    ok = False
+                    continue
+
+                # Invalidate before acking: a reader may briefly see the write in
+                # both the fresh snapshot and the overlay, which the overlay
+                # tolerates, but never in neither
+                self.on_applied(sheet_name)
+                self.journal.ack(seqs)
+
+        return ok
@@ -0,0 +1,105 @@
+# utils/paged_table.py
+
+import math
+
+import pandas as pd
+import streamlit as st
+
+PAGE_SIZES = [25, 50, 100, 250]
+
+def _filter(df: pd.DataFrame, text: str, columns: list) -> pd.DataFrame:
+    if not text:
+        return df
+
+    mask = pd.Series(False, index=df.index)
+    for col in columns:
+        mask |= df[col].astype(str).str.contains(text, case=False, regex=False, na=False)
+    return df[mask]
+
+def paged_table(
+    df: pd.DataFrame,
+    key: str,
+    page_size: int = 50,
+    sort_by: str | None = None,
+    ascending: bool = True,
+    search_columns: list | None = None,
+    **dataframe_kwargs,
+) -> pd.DataFrame:
+    # Filter, sort and slice on the server; only the visible page is sent to
+    # the browser. Returns the filtered + sorted frame (all pages) so callers
+    # can export or summarise what the user is looking at.
+    if df.empty:
+        st.dataframe(df, use_container_width=True, **dataframe_kwargs)
+        return df
+
+    columns = list(df.columns)
+    search_columns = [c for c in (search_columns or columns) if c in columns]
+
+    c1, c2, c3, c4 = st.columns([3, 2, 1, 1])
+    with c1:
+        text = st.text_input("Filter rows", key=f"{key}_filter").strip()
+    with c2:
+        sort_col = st.selectbox(
+            "Sort by",
+            columns,
+            index=columns.index(sort_by) if sort_by in columns else 0,
+            key=f"{key}_sort",
+        )
+    with c3:
+        order = st.selectbox(
+            "Order",
+            ["Ascending", "Descending"],
+            index=0 if ascending else 1,
+            key=f"{key}_order",
+        )
+    with c4:
+        size = st.selectbox(
+            "Rows",
+            PAGE_SIZES,
+            index=PAGE_SIZES.index(page_size) if page_size in PAGE_SIZES else 1,
+            key=f"{key}_size",
+        )
+
+    view = _filter(df, text, search_columns)
+    sort_args = dict(ascending=order == "Ascending", na_position="last", kind="stable")
+    try:
+        view = view.sort_values(sort_col, **sort_args)
+    except TypeError:
+        # Mixed numbers and text in one column
+        view = view.sort_values(sort_col, key=lambda col: col.astype(str), **sort_args)
+
+    pages = max(1, math.ceil(len(view) / size))
+
+    # Back to page 1 whenever the filter, sort or page size changes
+    signature = (text, sort_col, order, size)
+    if st.session_state.get(f"{key}_signature") != signature:
+        st.session_state[f"{key}_signature"] = signature
+        st.session_state[f"{key}_page"] = 1
+    if st.session_state.get(f"{key}_page", 1) > pages:
+        st.session_state[f"{key}_page"] = pages
+
+    start_row = (st.session_state.get(f"{key}_page", 1) - 1) * size
+    st.dataframe(
+        view.iloc[start_row:start_row + size],
+        use_container_width=True,
+        **dataframe_kwargs,
+    )
+
+    p1, p2 = st.columns([1, 3])
+    with p1:
+        page = st.number_input(
+            f"Page (of {pages})",
+            min_value=1,
+            max_value=pages,
+            step=1,
+            key=f"{key}_page",
+        )
+    with p2:
+        first = (page - 1) * size
+        st.caption(
+            f"Rows {min(first + 1, len(view))}–{min(first + size, len(view))} "
+            f"of {len(view)}"
+            + (f" (filtered from {len(df)})" if len(view) != len(df) else "")
+        )
+
+    return view
@@ -0,0 +1,59 @@
+# utils/pickers.py
+
+import streamlit as st
+import pandas as pd
+
+from utils.search_index import SearchIndex, build_index, get_index, sheet_index
+
+def frame_index(
+    name: str,
+    df: pd.DataFrame,
+    key: str,
+    columns: list[str],
+    label_columns: list[str],
+    version,
+) -> SearchIndex:
+    # Index (and labels) over a page's own frame, built once per version.
+    # The version must change whenever df would, e.g. the sheet's data version.
+    return get_index(name, version, lambda: build_index(df, key, columns, label_columns))
+
+def picker(
+    label: str,
+    index: SearchIndex | str,
+    key: str,
+    candidates=None,
+    limit: int = 20,
+    placeholder: str = "Type an ID or name…",
+):
+    # Typeahead: the text box is matched against the search index on the
+    # server and only the top `limit` matches are sent to the selectbox.
+    # `index` is a SearchIndex or the name of a sheet index; `candidates`
+    # narrows it to the keys that can be picked here (e.g. available
+    # assets). Returns the picked key, or None when nothing matches.
+    if isinstance(index, str):
+        index = sheet_index(index)
+    allowed = None if candidates is None else set(candidates)
+
+    text = st.text_input(label, key=f"{key}_query", placeholder=placeholder).strip()
+    if text:
+        matches = index.search(text)
+    else:
+        matches = index.keys
+    if allowed is not None:
+        matches = [k for k in matches if k in allowed]
+
+    if not matches:
+        st.caption("No matches.")
+        return None
+
+    # label -> key for just the shown matches
+    shown = {index.labels.get(k, str(k)): k for k in matches[:limit]}
+    choice = st.selectbox(
+        label,
+        list(shown),
+        key=f"{key}_choice",
+        label_visibility="collapsed",
+    )
+    if len(matches) > limit:
+        st.caption(f"Showing {limit} of {len(matches)} matches; keep typing to narrow down.")
+    return shown[choice]
@@ -0,0 +1,218 @@
+# utils/replica.py
+
+import re
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+from gspread.utils import absolute_range_name, rowcol_to_a1
+
+from utils.backends import (
+    GoogleSheetsBackend,
+    SQLiteBackend,
+    StorageBackend,
+    to_cell,
+    values_to_frame,
+)
+
+# Local on-disk copy of the Google spreadsheet, kept in a SQLite file so it
+# survives restarts. Reads are answered from the file; a sheet is synced from
+# Google only once its last sync is older than sync_seconds.
+#
+# Google Sheets has no change feed, so an incremental sync fetches the header
+# row plus everything from the last locally known row down. If that row still
+# matches, only the rows after it are stored. If it doesn't (rows deleted,
+# sheet rewritten) or the header changed, the sheet is replaced wholesale.
+# Hand edits to older rows are picked up by the full sync every
+# full_sync_seconds. Writes made through the app go to Google first and are
+# then applied to the local copy as well.
+class ReplicatedBackend(StorageBackend):
+    batch_reads = True
+
+    def __init__(
+        self,
+        source: GoogleSheetsBackend,
+        store: SQLiteBackend,
+        sync_seconds: float,
+        full_sync_seconds: float,
+    ):
+        self.source = source
+        self.store = store
+        self.sync_seconds = sync_seconds
+        self.full_sync_seconds = full_sync_seconds
+
+        self._lock = threading.Lock()
+
+        with store.transaction() as con:
+            con.execute(
+                "CREATE TABLE IF NOT EXISTS _replica_sync ("
+                " sheet_name TEXT PRIMARY KEY,"
+                " synced_at REAL NOT NULL,"
+                " full_synced_at REAL NOT NULL)"
+            )
+
+    # ─────────────────────────────────────────
+    # Sync bookkeeping
+    # ─────────────────────────────────────────
+    def _sync_state(self, sheet_names: list[str]) -> dict:
+        con = self.store._connect()
+        rows = con.execute(
+            "SELECT sheet_name, synced_at, full_synced_at FROM _replica_sync "
+            f"WHERE sheet_name IN ({', '.join('?' for _ in sheet_names)})",
+            list(sheet_names),
+        ).fetchall()
+        return {name: (synced_at, full_at) for name, synced_at, full_at in rows}
+
+    def _mark_synced(self, con, sheet_name: str, full: bool):
+        now = time.time()
+        con.execute(
+            "INSERT INTO _replica_sync (sheet_name, synced_at, full_synced_at) "
+            "VALUES (?, ?, ?) "
+            "ON CONFLICT (sheet_name) DO UPDATE SET synced_at = excluded.synced_at"
+            + (", full_synced_at = excluded.full_synced_at" if full else ""),
+            (sheet_name, now, now if full else 0),
+        )
+
+    def _mark_stale(self, sheet_name: str):
+        # Next read of this sheet does a full sync
+        with self.store.transaction() as con:
+            con.execute(
+                "UPDATE _replica_sync SET full_synced_at = 0 WHERE sheet_name = ?",
+                (sheet_name,),
+            )
+
+    def last_synced(self, sheet_name: str) -> datetime | None:
+        state = self._sync_state([sheet_name]).get(sheet_name)
+        return datetime.fromtimestamp(state[0]) if state else None
+
+    # ─────────────────────────────────────────
+    # Sync
+    # ─────────────────────────────────────────
+    def _full_sync(self, sheet_names: list[str], local: dict):
+        if not sheet_names:
+            return
+
+        fetched = self.source.batch_get_values(
+            [absolute_range_name(name) for name in sheet_names]
+        )
+
+        with self.store.transaction() as con:
+            for name, values in zip(sheet_names, fetched):
+                self.store.replace_values(name, values, con)
+                self._mark_synced(con, name, full=True)
+                local[name] = self.store.read_values(name)
+
+    def _incremental_sync(self, sheet_names: list[str], local: dict) -> list[str]:
+        # Returns the sheets that turned out to need a full sync
+        if not sheet_names:
+            return []
+
+        ranges = []
+        for name in sheet_names:
+            header, rows = local[name][0], local[name][1:]
+            last_col = re.sub(r"\d", "", rowcol_to_a1(1, len(header)))
+            ranges.append(absolute_range_name(name, "1:1"))
+            ranges.append(absolute_range_name(name, f"A{len(rows) + 1}:{last_col}"))
+
+        try:
+            fetched = self.source.batch_get_values(ranges)
+        except Exception:
+            # e.g. the sheet shrank below the last known row
+            return list(sheet_names)
+
+        needs_full = []
+        with self.store.transaction() as con:
+            for i, name in enumerate(sheet_names):
+                header, last_row = local[name][0], local[name][-1]
+                width = len(header)
+                remote_header = (fetched[2 * i] or [[]])[0]
+                tail = fetched[2 * i + 1]
+
+                def _pad(row):
+                    return [to_cell(v) for v in (list(row) + [""] * width)[:width]]
+
+                if (
+                    _pad(remote_header) != _pad(header)
+                    or len(remote_header) > width
+                    or not tail
+                    or _pad(tail[0]) != _pad(last_row)
+                ):
+                    needs_full.append(name)
+                    continue
+
+                if tail[1:]:
+                    self.store.append_values(name, tail[1:], con)
+                    local[name] = local[name] + [_pad(row) for row in tail[1:]]
+                self._mark_synced(con, name, full=False)
+
+        return needs_full
+
+    def read_sheets(self, sheet_names: list[str]) -> dict[str, pd.DataFrame]:
+        with self._lock:
+            now = time.time()
+            state = self._sync_state(sheet_names)
+            local = {name: self.store.read_values(name) for name in sheet_names}
+
+            due_full, due_tail = [], []
+            for name in sheet_names:
+                synced_at, full_at = state.get(name, (0, 0))
+                if len(local[name]) < 2 or now - full_at > self.full_sync_seconds:
+                    due_full.append(name)
+                elif now - synced_at > self.sync_seconds:
+                    due_tail.append(name)
+
+            try:
+                due_full += self._incremental_sync(due_tail, local)
+                self._full_sync(due_full, local)
+            except Exception:
+                # Google unreachable: keep serving the local copy if there is one
+                if any(name not in state for name in sheet_names):
+                    raise
+
+        return {name: values_to_frame(local[name]) for name in sheet_names}
+
+    def read_sheet(self, sheet_name: str) -> pd.DataFrame:
+        return self.read_sheets([sheet_name])[sheet_name]
+
+    # ─────────────────────────────────────────
+    # Writes: Google first, then the local copy
+    # ─────────────────────────────────────────
+    def _write_through(self, sheet_name: str, fn):
+        try:
+            with self._lock:
+                fn()
+        except Exception:
+            self._mark_stale(sheet_name)
+
+    def refresh(self, sheet_name: str | None = None):
+        self.source.refresh(sheet_name)
+
+    def authoritative(self) -> StorageBackend:
+        return self.source
+
+    def is_sheet_error(self, exc: Exception) -> bool:
+        return self.source.is_sheet_error(exc)
+
+    def write_sheet(self, sheet_name: str, df: pd.DataFrame):
+        self.source.write_sheet(sheet_name, df)
+        self._write_through(sheet_name, lambda: self.store.write_sheet(sheet_name, df))
+
+    def append_rows(self, sheet_name: str, rows: list[dict], chunk_size: int):
+        self.source.append_rows(sheet_name, rows, chunk_size)
+
+        header = self.source.header(sheet_name)
+        self._write_through(
+            sheet_name,
+            lambda: self.store.append_values(
+                sheet_name,
+                [[to_cell(row.get(col, "")) for col in header] for row in rows],
+            ),
+        )
+
+    def update_rows(self, sheet_name: str, key_column: str, changes: dict):
+        self.source.update_rows(sheet_name, key_column, changes)
+        self._write_through(
+            sheet_name,
+            lambda: self.store.update_rows(sheet_name, key_column, changes),
+        )
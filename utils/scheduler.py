@@ -0,0 +1,141 @@
+# utils/scheduler.py
+
+import random
+import threading
+import time
+
+# Everything that talks to the Sheets API goes through a RequestScheduler:
+#
+# - a token bucket per request kind ("read" / "write") sized to the API quota,
+#   so bursts from many sessions queue up here instead of coming back as 429s
+# - exponential backoff with full jitter on 429 responses, and on 5xx for
+#   reads and idempotent writes (a 5xx can arrive after an append was stored,
+#   so retrying one could duplicate rows)
+# - coalescing: concurrent reads with the same key share one request, but a
+#   read only joins one that started after the last write finished, so a
+#   session always sees its own writes
+#
+# It only needs a callable per request and an exception carrying
+# .response.status_code (gspread.exceptions.APIError, requests.HTTPError), so
+# it can be exercised against any local HTTP endpoint.
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Rejected before anything was applied: safe to resend any write
+THROTTLE_STATUSES = (429,)
+
+def _status_code(exc: Exception):
+    response = getattr(exc, "response", None)
+    return getattr(response, "status_code", None)
+
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, burst: float, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(burst, 1.0)
+        self.clock = clock
+        self.sleep = sleep
+
+        self._tokens = self.capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = self.clock()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.rate,
+                )
+                self._updated = now
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                wait = (1 - self._tokens) / self.rate
+
+            self.sleep(wait)
+
+class _InFlight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class RequestScheduler:
+    def __init__(
+        self,
+        read_per_minute: float = 60,
+        write_per_minute: float = 60,
+        burst: float | None = None,
+        max_retries: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 32.0,
+        clock=time.monotonic,
+        sleep=time.sleep,
+    ):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.sleep = sleep
+
+        self._buckets = {
+            "read": TokenBucket(read_per_minute, burst or read_per_minute / 6, clock, sleep),
+            "write": TokenBucket(write_per_minute, burst or write_per_minute / 6, clock, sleep),
+        }
+        self._inflight = {}
+        self._write_generation = 0      # bumped as each write finishes
+        self._lock = threading.Lock()
+
+    def read(self, fn, key=None):
+        if key is None:
+            return self._run(fn, "read")
+
+        with self._lock:
+            key = (key, self._write_generation)
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = self._inflight[key] = _InFlight()
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = self._run(fn, "read")
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+            call.done.set()
+
+    def write(self, fn, idempotent: bool = False):
+        # idempotent: sending the request twice leaves the same result
+        # (values.update, batchUpdate, resize), unlike values.append
+        try:
+            return self._run(
+                fn, "write", RETRY_STATUSES if idempotent else THROTTLE_STATUSES
+            )
+        finally:
+            with self._lock:
+                self._write_generation += 1
+
+    def _run(self, fn, kind: str, retry_statuses=RETRY_STATUSES):
+        attempt = 0
+        while True:
+            self._buckets[kind].acquire()
+            try:
+                return fn()
+            except Exception as e:
+                if _status_code(e) not in retry_statuses or attempt >= self.max_retries:
+                    raise
+
+            delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+            self.sleep(random.uniform(0, delay))
+            attempt += 1
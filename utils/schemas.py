@@ -0,0 +1,122 @@
+# utils/schemas.py
+
+import pandas as pd
+
+from utils.constants import (
+    USERS_SHEET,
+    ASSETS_MASTER_SHEET,
+    ASSET_ASSIGNMENTS_SHEET,
+    SOFTWARE_ASSIGNMENTS_SHEET,
+    SOFTWARE_MASTER_SHEET,
+    EMPLOYEE_MASTER_SHEET,
+    CREDENTIALS_SHEET,
+    CCTV_WIFI_SHEET,
+)
+
+# Column types per sheet, applied once when a sheet is loaded so cached
+# frames are already typed. Columns not listed stay as read.
+BOOL = "bool"           # nullable boolean: TRUE/true/yes/1 → True, unknown → <NA>
+DATE = "date"           # datetime64, ISO 8601 with a day-first fallback
+NUMBER = "number"       # float64, blanks → NaN
+CATEGORY = "category"   # pandas Categorical for low-cardinality labels
+
+SCHEMAS = {
+    USERS_SHEET: {
+        "is_active": BOOL,
+    },
+    ASSETS_MASTER_SHEET: {
+        "category": CATEGORY,
+        "location": CATEGORY,
+        "purchase_date": DATE,
+        "warranty_end": DATE,
+        "is_active": BOOL,
+        "created_at": DATE,
+        "updated_at": DATE,
+    },
+    ASSET_ASSIGNMENTS_SHEET: {
+        "assigned_on": DATE,
+        "returned_on": DATE,
+        "assignment_status": CATEGORY,
+        "created_at": DATE,
+    },
+    SOFTWARE_MASTER_SHEET: {
+        "status": CATEGORY,
+        "monthly_price": NUMBER,
+        "yearly_price": NUMBER,
+        "created_at": DATE,
+        "updated_at": DATE,
+    },
+    SOFTWARE_ASSIGNMENTS_SHEET: {
+        "assigned_on": DATE,
+        "returned_on": DATE,
+        "assignment_status": CATEGORY,
+        "created_at": DATE,
+    },
+    EMPLOYEE_MASTER_SHEET: {
+        "department": CATEGORY,
+        "location": CATEGORY,
+        "employment_status": CATEGORY,
+    },
+    CREDENTIALS_SHEET: {
+        "category": CATEGORY,
+        "created_at": DATE,
+    },
+    CCTV_WIFI_SHEET: {
+        "location": CATEGORY,
+        "device_type": CATEGORY,
+        "created_at": DATE,
+    },
+}
+
+_TRUE = {"true", "1", "yes", "y"}
+_FALSE = {"false", "0", "no", "n"}
+
+def _to_bool(col: pd.Series) -> pd.Series:
+    text = col.astype(str).str.strip().str.lower()
+    out = pd.Series(pd.NA, index=col.index, dtype="boolean")
+    out[text.isin(_TRUE)] = True
+    out[text.isin(_FALSE)] = False
+    return out
+
+def _to_date(col: pd.Series) -> pd.Series:
+    text = col.astype(str).str.strip()
+    out = pd.to_datetime(text, format="ISO8601", errors="coerce")
+
+    # Dates typed by hand in the sheet, e.g. 05/03/2024
+    retry = out.isna() & text.ne("") & ~text.isin(["nan", "NaT", "None", "<NA>"])
+    if retry.any():
+        out[retry] = pd.to_datetime(
+            text[retry], format="mixed", dayfirst=True, errors="coerce"
+        )
+    return out
+
+def _coerce(col: pd.Series, kind: str) -> pd.Series:
+    if kind == BOOL:
+        return col if col.dtype == "boolean" else _to_bool(col)
+
+    if kind == DATE:
+        return col if pd.api.types.is_datetime64_dtype(col) else _to_date(col)
+
+    if kind == NUMBER:
+        return col if pd.api.types.is_float_dtype(col) else pd.to_numeric(
+            col.replace("", None), errors="coerce"
+        ).astype("float64")
+
+    if kind == CATEGORY:
+        if isinstance(col.dtype, pd.CategoricalDtype):
+            return col
+        return col.where(col.astype(str).str.strip().ne(""), None).astype("category")
+
+    raise ValueError(f"Unknown column type {kind!r}")
+
+def apply_schema(sheet_name: str, df: pd.DataFrame) -> pd.DataFrame:
+    # Idempotent: already-typed columns are returned as they are
+    schema = SCHEMAS.get(sheet_name)
+    if not schema or df.empty:
+        return df
+
+    df = df.copy()
+    for col, kind in schema.items():
+        if col in df.columns:
+            df[col] = _coerce(df[col], kind)
+    return df
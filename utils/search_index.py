@@ -0,0 +1,258 @@
+# utils/search_index.py
+
+import heapq
+import re
+import threading
+from bisect import bisect_left
+from collections import OrderedDict, defaultdict
+
+import pandas as pd
+
+from utils.constants import EMPLOYEE_MASTER_SHEET, ASSETS_MASTER_SHEET, SOFTWARE_MASTER_SHEET
+from utils.gsheets import get_sheet_version, pending_writes, read_sheet
+
+# Words are runs of letters or digits; "EMP-001" and "EMP001" both give
+# "emp" and "001" (the joined "emp001" is kept too)
+_WORD_RE = re.compile(r"[^\W_]+")
+_PART_RE = re.compile(r"[^\W\d_]+|\d+")
+
+# Minimum Dice similarity of trigrams for a typo to still count as a match
+FUZZY_THRESHOLD = 0.5
+
+def tokenize(text) -> list[str]:
+    if text is None or text is pd.NA or (isinstance(text, float) and text != text):
+        return []
+    tokens = []
+    for word in _WORD_RE.findall(str(text).lower()):
+        tokens.append(word)
+        parts = _PART_RE.findall(word)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+def _trigrams(token: str) -> set[str]:
+    padded = f"${token}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+# In-memory search over a fixed set of documents (one per key).
+#
+# Every query word must match a word of the document: exactly, as a prefix,
+# or (for words of 3+ characters) anywhere inside it, e.g. the middle digits
+# of an ID, or by trigram similarity, which forgives a typo or two. Prefixes
+# are found by binary search in the sorted vocabulary; inner matches and
+# typos through a trigram -> word postings map. Only the most selective
+# query word is looked up that way; the other words are checked against
+# the few documents it matched, so a lookup never walks every document.
+class SearchIndex:
+    def __init__(self, keys: list, texts: list[str], labels: list[str] | None = None):
+        self.keys = list(keys)
+        # key -> display label, for pickers
+        self.labels = dict(zip(self.keys, labels if labels is not None else map(str, self.keys)))
+
+        postings = defaultdict(set)     # word -> document positions
+        doc_words = []
+        for position, text in enumerate(texts):
+            words = set(tokenize(text))
+            doc_words.append(words)
+            for token in words:
+                postings[token].add(position)
+
+        self._words = sorted(postings)
+        self._postings = [postings[word] for word in self._words]
+        positions = {word: position for position, word in enumerate(self._words)}
+        self._doc_words = [tuple(positions[word] for word in words) for words in doc_words]
+
+        # Running total of postings sizes, to size up a prefix without walking it
+        self._cumulative = [0]
+        for docs in self._postings:
+            self._cumulative.append(self._cumulative[-1] + len(docs))
+
+        self._trigrams = defaultdict(list)   # trigram -> word positions
+        self._trigram_counts = []
+        for position, word in enumerate(self._words):
+            grams = _trigrams(word)
+            self._trigram_counts.append(len(grams))
+            for gram in grams:
+                self._trigrams[gram].append(position)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _prefix_range(self, token: str) -> tuple[int, int]:
+        start = bisect_left(self._words, token)
+        return start, bisect_left(self._words, token + "\uffff", lo=start)
+
+    def _estimate(self, token: str) -> int:
+        start, end = self._prefix_range(token)
+        return self._cumulative[end] - self._cumulative[start]
+
+    def _word_scores(self, token: str) -> dict:
+        # vocabulary position -> score (3 exact, 2 prefix, 1 inner, < 1 typo)
+        scores = {}
+
+        start, end = self._prefix_range(token)
+        for position in range(start, end):
+            scores[position] = 3.0 if self._words[position] == token else 2.0
+
+        # Inner matches: words holding the token's rarest trigram, verified
+        if len(token) >= 3:
+            grams = [token[i:i + 3] for i in range(len(token) - 2)]
+            rarest = min((self._trigrams.get(gram, ()) for gram in grams), key=len)
+            for position in rarest:
+                if position not in scores and token in self._words[position]:
+                    scores[position] = 1.0
+
+        # Numbers (ids) only match by prefix; "00042" is not a typo of "00043"
+        if len(token) >= 3 and not token.isdigit():
+            grams = _trigrams(token)
+            shared = defaultdict(int)
+            for gram in grams:
+                for position in self._trigrams.get(gram, ()):
+                    shared[position] += 1
+
+            for position, count in shared.items():
+                similarity = 2 * count / (len(grams) + self._trigram_counts[position])
+                if similarity >= FUZZY_THRESHOLD and position not in scores:
+                    scores[position] = similarity
+
+        return scores
+
+    def _match(self, token: str) -> dict:
+        # document position -> score for one query word
+        scores = {}
+        for position, score in self._word_scores(token).items():
+            for doc in self._postings[position]:
+                if scores.get(doc, 0) < score:
+                    scores[doc] = score
+        return scores
+
+    def search(self, text: str, limit: int | None = None) -> list:
+        # Keys of the matching documents, best match first
+        tokens = list(dict.fromkeys(tokenize(text)))
+        if not tokens:
+            return []
+
+        tokens.sort(key=lambda token: (self._estimate(token), -len(token)))
+        scores = self._match(tokens[0])
+        for token in tokens[1:]:
+            if not scores:
+                return []
+            word_scores = self._word_scores(token)
+            scores = {
+                doc: score + extra
+                for doc, score in scores.items()
+                if (extra := max(
+                    (word_scores.get(word, 0) for word in self._doc_words[doc]),
+                    default=0,
+                ))
+            }
+
+        order = lambda doc: (-scores[doc], doc)
+        if limit is not None:
+            ranked = heapq.nsmallest(limit, scores, key=order)
+        else:
+            ranked = sorted(scores, key=order)
+        return [self.keys[doc] for doc in ranked]
+
+def _joined(df: pd.DataFrame, columns: list[str], sep: str) -> list[str]:
+    # Column-wise string concatenation; blanks for missing values
+    if not columns:
+        return [""] * len(df)
+    parts = [df[c].astype(object).where(df[c].notna(), "").astype(str) for c in columns]
+    joined = parts[0]
+    for part in parts[1:]:
+        joined = joined + sep + part
+    return joined.tolist()
+
+def build_index(
+    df: pd.DataFrame,
+    key: str,
+    columns: list[str],
+    label_columns: list[str] | None = None,
+) -> SearchIndex:
+    columns = [c for c in columns if c in df.columns]
+    if df.empty or key not in df.columns:
+        return SearchIndex([], [])
+
+    df = df.drop_duplicates(subset=[key])
+    labels = None
+    if label_columns:
+        labels = _joined(df, [c for c in label_columns if c in df.columns], " | ")
+    return SearchIndex(df[key].tolist(), _joined(df, columns, " "), labels)
+
+# ─────────────────────────────────────────────
+# Index cache (one build per data version)
+# ─────────────────────────────────────────────
+_MAX_INDEXES = 16
+_indexes = OrderedDict()    # (name, version) -> SearchIndex
+_indexes_lock = threading.Lock()
+
+def get_index(name: str, version, build) -> SearchIndex:
+    # version None means the data has no stable version; build every time
+    if version is None:
+        return build()
+
+    with _indexes_lock:
+        index = _indexes.get((name, version))
+        if index is not None:
+            _indexes.move_to_end((name, version))
+            return index
+
+    index = build()
+    with _indexes_lock:
+        # Older versions of this index are dead weight now
+        for cached in [k for k in _indexes if k[0] == name]:
+            del _indexes[cached]
+        _indexes[(name, version)] = index
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+def sheet_data_version(sheet_name: str):
+    # None when the sheet isn't in the shared cache (no stable version)
+    version = get_sheet_version(sheet_name)
+    if version is None:
+        return None
+    return version, pending_writes(sheet_name)
+
+# Indexes over the master sheets:
+#   name -> (sheet, key column, searched columns, label columns)
+SHEET_INDEXES = {
+    "employees": (
+        EMPLOYEE_MASTER_SHEET,
+        "employee_id",
+        ["employee_id", "employee_name"],
+        ["employee_id", "employee_name"],
+    ),
+    "assets": (
+        ASSETS_MASTER_SHEET,
+        "asset_id",
+        ["asset_id", "asset_name", "category", "brand", "model", "location"],
+        ["asset_id", "asset_name", "location"],
+    ),
+    "software": (
+        SOFTWARE_MASTER_SHEET,
+        "soft_id",
+        ["soft_id", "soft_name"],
+        ["soft_id", "soft_name"],
+    ),
+}
+
+def sheet_index(name: str) -> SearchIndex:
+    sheet_name, key, columns, label_columns = SHEET_INDEXES[name]
+
+    def build():
+        df = read_sheet(sheet_name)
+        df = df.rename(columns=lambda c: str(c).strip().lower())
+        return build_index(df, key, columns, label_columns)
+
+    version = sheet_data_version(sheet_name)
+    if version is None:
+        # Snapshot expired: reload it (usually same content, same version)
+        # so an unchanged sheet doesn't rebuild its index
+        read_sheet(sheet_name)
+        version = sheet_data_version(sheet_name)
+    return get_index(name, version, build)
+
+def search_keys(name: str, text: str, limit: int | None = None) -> list:
+    return sheet_index(name).search(text, limit=limit)
@@ -0,0 +1,16 @@
+# utils/settings.py
+
+import streamlit as st
+
+# Tunables live in .streamlit/secrets.toml, e.g.
+#
+#   [data]
+#   cache_ttl_seconds = 60
+#
+# Missing sections / keys (or no secrets file at all) fall back to defaults.
+
+def get_setting(section: str, key: str, default=None):
+    if not st.secrets.load_if_toml_exists():
+        return default
+
+    return st.secrets.get(section, {}).get(key, default)
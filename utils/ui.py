@@ -1,6 +1,10 @@
 # utils/ui.py
+from datetime import datetime
+
 import streamlit as st
 
+from utils.gsheets import get_last_sync, pending_writes
+
 def apply_global_ui():
     st.markdown(
         """
@@ -33,3 +37,19 @@ def apply_global_ui():
         """,
         unsafe_allow_html=True
     )
+
+
+def show_data_freshness(sheet_names: list[str]):
+    pending = sum(pending_writes(name) for name in sheet_names)
+    if pending:
+        st.caption(f"⏳ {pending} change(s) waiting to be saved to Google Sheets")
+
+    synced = [get_last_sync(name) for name in sheet_names]
+    if not synced or any(ts is None for ts in synced):
+        return
+
+    minutes = int((datetime.now() - min(synced)).total_seconds() // 60)
+    if minutes < 1:
+        st.caption("🔄 Data synced just now")
+    else:
+        st.caption(f"🔄 Data synced {minutes} min ago")